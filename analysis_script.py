@@ -1,110 +1,163 @@
 # %%
-import ast
-import shutil
-from pathlib import Path
-
-import matplotlib.pyplot as plt
-import pandas as pd
 import polars as pl
 
-root_dir_results = Path("./results_check_parquet_file")
-
-for name_df_lib in ["polars", "pandas"]:
-    print("##########################################################################################")
-    print(f"Analysis of parquet files created by {name_df_lib}:")
-    print("##########################################################################################")
+from results_store import scan_results, violation_counts
 
-    output_dir_results = root_dir_results / name_df_lib
-    errors_file = output_dir_results / "all_errors_reading_files.csv"
-    violations_file = output_dir_results / "all_violations.csv"
+# Number of bins the positions of the violations within a list are counted in
+NUM_POSITION_BINS = 20
+# Number of largest deviations shown per group
+TOP_K = 5
 
-    errors_df = pl.read_csv(errors_file)
-    if errors_df.height == 0:
-        print("No errors found")
+# in_memory separates runs decoding from the cached bytes of the files from runs reading from disk
+keys = ["writer_lib", "engine", "file_index", "in_memory"]
 
-    violations_df = pl.read_csv(violations_file)
-    if violations_df.height == 0:
-        print("No violations found")
-        continue
+# lazy scans of all runs, filters on writer_lib/engine/run_id only read the matching partitions
+# runs from before the in_memory option read from disk
+errors_lf, reads_lf, violations_lf, events_lf = [
+    scan_results(table).with_columns(pl.col("in_memory").fill_null(False))
+    for table in ["errors", "reads", "violations", "events"]
+]
 
-    violations_df = violations_df.with_columns(
-        pl.col("data_1").map_elements(lambda x: ast.literal_eval(x), return_dtype=pl.List(pl.Float64)),
-        pl.col("data_2").map_elements(lambda x: ast.literal_eval(x), return_dtype=pl.List(pl.Float64)),
+# one row per violating element, violations without elements (embedded_digests mode) have none
+elements_lf = (
+    violations_lf.select(
+        *keys, "run_id", "num_workers", "rep", "classification", "length_1", "data_1", "data_2", "indices_violation"
     )
+    .explode(["data_1", "data_2", "indices_violation"])
+    .with_columns((pl.col("data_1") - pl.col("data_2")).abs().alias("abs_diff"))
+    .with_columns((pl.col("abs_diff") / pl.col("data_1").abs()).alias("abs_relative_diff"))
+)
 
-    violations_df = violations_df.with_columns(
-        pl.col("data_1").len().alias("len_data_1"),
-        pl.col("data_2").len().alias("len_data_2"),
-    )
+num_reads_lf = reads_lf.group_by(keys).agg(
+    pl.col("num_reads").sum(),
+    pl.col("copied_num_bytes_max", "arrow_allocated_num_bytes_max", "rss_delta_num_bytes_max").max(),
+)
+num_errors_lf = errors_lf.group_by(keys).agg(pl.len().alias("num_errors"))
 
-    if violations_df.filter(pl.col("len_data_1") != pl.col("len_data_2")).height > 0:
-        print("Lengths differ")
+max_diffs_lf = elements_lf.group_by(keys).agg(
+    pl.col("abs_diff").max().alias("max_abs_diff"),
+    pl.col("abs_relative_diff").max().alias("max_abs_relative_diff"),
+)
 
-    violations_df = violations_df.drop("len_data_1").rename({"len_data_2": "num_violations"})
+# the counts come from the violations themselves, not from the exploded elements
+summary_lf = (
+    violation_counts(violations_lf, keys)
+    .join(max_diffs_lf, on=keys, how="left")
+    .join(num_reads_lf, on=keys, how="full", coalesce=True)
+    .join(num_errors_lf, on=keys, how="full", coalesce=True)
+    .with_columns(pl.col("num_reads_with_violations", "total_violations", "num_errors").fill_null(0))
+    .with_columns((pl.col("num_reads_with_violations") / pl.col("num_reads")).alias("violation_rate_per_read"))
+    .sort(keys)
+)
 
-    tot_violations = (
-        violations_df.group_by("name_test")
-        .agg(pl.col("num_violations").sum().alias("total_violations"))
-        .sort("total_violations")
+# time per phase of the repetitions (read, sort, hash, compare, localize)
+phases_lf = (
+    events_lf.group_by(*keys, "phase")
+    .agg(
+        pl.len().alias("num_events"),
+        pl.col("wall_s").mean().alias("wall_s_mean"),
+        pl.col("wall_s").quantile(0.99).alias("wall_s_p99"),
+        pl.col("wall_s").max().alias("wall_s_max"),
+        pl.col("cpu_s").mean().alias("cpu_s_mean"),
+        pl.col("read_num_bytes").mean().alias("read_num_bytes_mean"),
     )
-
-    print(tot_violations)
-
-    for name_test in violations_df["name_test"].unique():
-        df = violations_df.filter(pl.col("name_test") == name_test)
-        df = df.explode(["data_1", "data_2"])
-
-        df = df.with_columns((pl.col("data_1") - pl.col("data_2")).alias("diff"))
-        df = df.with_columns(pl.col("diff").abs().alias("abs_diff"))
-        df = df.with_columns((pl.col("abs_diff") / pl.col("data_1").abs()).alias("abs_relative_diff"))
-
-        cols = ["name_test", "data_1", "data_2", "abs_diff", "abs_relative_diff"]
-        df = df.sort(by="abs_diff", descending=True)
-        print("sorted by abs_diff")
-        print("head")
-        print(df.select(cols).head(5))
-        # print("tail")
-        # print(df.select(cols).tail(5))
-
-        df = df.sort(by="abs_relative_diff", descending=True)
-        print("sorted by abs_relative_diff")
-        print("head")
-        print(df.select(cols).head(5))
-        # print("tail")
-        # print(df.select(cols).tail(5))
-
-
-# %%
-
-
-output_dir_results = root_dir_results / "polars"
-violations_file = output_dir_results / "all_violations.csv"
-violations_df = pl.read_csv(violations_file)
-
-violations_df = violations_df.with_columns(
-    pl.col("data_1").map_elements(lambda x: ast.literal_eval(x), return_dtype=pl.List(pl.Float64)),
-    pl.col("data_2").map_elements(lambda x: ast.literal_eval(x), return_dtype=pl.List(pl.Float64)),
+    .sort(*keys, "phase")
 )
 
-violations_df = violations_df.with_columns(
-    pl.col("data_1").len().alias("len_data_1"),
-    pl.col("data_2").len().alias("len_data_2"),
+# read times of the repetitions with and without violations
+keys_rep = [*keys, "run_id", "num_workers", "rep"]
+reads_by_violation_lf = (
+    events_lf.filter(pl.col("phase") == "read")
+    .select(*keys_rep, "wall_s")
+    .join(
+        violations_lf.select(keys_rep).unique().with_columns(pl.lit(True).alias("has_violations")),
+        on=keys_rep,
+        how="left",
+    )
+    .with_columns(pl.col("has_violations").fill_null(False))
+    .group_by(*keys, "has_violations")
+    .agg(
+        pl.len().alias("num_reads"),
+        pl.col("wall_s").mean().alias("read_wall_s_mean"),
+        pl.col("wall_s").max().alias("read_wall_s_max"),
+    )
+    .sort(*keys, "has_violations")
 )
 
-if violations_df.filter(pl.col("len_data_1") != pl.col("len_data_2")).height > 0:
-    print("Lengths differ")
 
-violations_df = violations_df.drop("len_data_1").rename({"len_data_2": "num_violations"})
+def top_k_by(col: str) -> pl.LazyFrame:
+    # top-k per group instead of sorting all violating elements
+    cols = ["data_1", "data_2", "indices_violation", "abs_diff", "abs_relative_diff"]
+    return (
+        elements_lf.group_by(keys)
+        .agg(pl.col(cols).top_k_by(col, TOP_K))
+        .explode(cols)
+        .sort([*keys, col], descending=[False] * len(keys) + [True])
+    )
 
-tot_violations = (
-    violations_df.group_by("name_test")
-    .agg(pl.col("num_violations").sum().alias("total_violations"))
-    .sort("total_violations")
-)
 
-print(tot_violations)
+def histogram(expr: pl.Expr, name: str) -> pl.LazyFrame:
+    return elements_lf.group_by(*keys, expr.alias(name)).agg(pl.len().alias("count")).sort([*keys, name])
+
+
+position_bin = (pl.col("indices_violation") * NUM_POSITION_BINS // pl.col("length_1")).alias("position_bin")
+
+# all outputs share the scan of the store and are computed together with the streaming engine
+(
+    summary,
+    top_abs_diff,
+    top_abs_relative_diff,
+    positions,
+    hist_abs_diff,
+    hist_abs_relative_diff,
+    classifications,
+    phases,
+    reads_by_violation,
+) = pl.collect_all(
+    [
+        summary_lf,
+        top_k_by("abs_diff"),
+        top_k_by("abs_relative_diff"),
+        histogram(position_bin, "position_bin"),
+        histogram(pl.col("abs_diff").log10().floor(), "log10_abs_diff"),
+        histogram(pl.col("abs_relative_diff").log10().floor(), "log10_abs_relative_diff"),
+        # null unless the run localized its violations (forensics_dir in test_read_parquet_file.py)
+        histogram(pl.col("classification"), "classification"),
+        phases_lf,
+        reads_by_violation_lf,
+    ],
+    engine="streaming",
+)
 
-df = pl.read_parquet("synthetic_parquet_files/pandas/data_000.parquet")[12]
-print(violations_df)
-print(f"correct value, value1: {df['value'].to_numpy()[0][1125925]}")
-print(f"value in neighbouring col value2{df['value2'].to_numpy()[0][1125925]}")
+with pl.Config(tbl_rows=100):
+    # writer_lib is the layout of the files (see synthetic_parquet_files/catalog.parquet)
+    for name_df_lib in summary["writer_lib"].unique().sort():
+        print("##########################################################################################")
+        print(f"Analysis of parquet files of layout {name_df_lib}:")
+        print("##########################################################################################")
+
+        summary_lib = summary.filter(pl.col("writer_lib") == name_df_lib)
+        # the summary also holds the largest memory use of a read per engine
+        print(summary_lib)
+        print("wall and CPU time per phase of the repetitions")
+        print(phases.filter(pl.col("writer_lib") == name_df_lib))
+        if summary_lib["num_errors"].sum() == 0:
+            print("No errors found")
+        if summary_lib["num_reads_with_violations"].sum() == 0:
+            print("No violations found")
+            continue
+
+        print(f"sorted by abs_diff, top {TOP_K} per engine and file")
+        print(top_abs_diff.filter(pl.col("writer_lib") == name_df_lib))
+        print(f"sorted by abs_relative_diff, top {TOP_K} per engine and file")
+        print(top_abs_relative_diff.filter(pl.col("writer_lib") == name_df_lib))
+        print(f"position of the violations within the lists ({NUM_POSITION_BINS} bins)")
+        print(positions.filter(pl.col("writer_lib") == name_df_lib))
+        print("histogram of abs_diff (decades)")
+        print(hist_abs_diff.filter(pl.col("writer_lib") == name_df_lib))
+        print("histogram of abs_relative_diff (decades)")
+        print(hist_abs_relative_diff.filter(pl.col("writer_lib") == name_df_lib))
+        print("violating elements per fault classification")
+        print(classifications.filter(pl.col("writer_lib") == name_df_lib))
+        print("read time of the repetitions with and without violations")
+        print(reads_by_violation.filter(pl.col("writer_lib") == name_df_lib))
@@ -0,0 +1,189 @@
+# %%
+import json
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from tqdm import tqdm
+
+from buffer_hashing import list_column_rows
+from parquet_manifest import library_versions, read_catalog
+
+# Configuration
+NUM_REPS = 10
+DIR_PARQUET_FILES = Path("./synthetic_parquet_files")
+OUTPUT_DIR = Path("./benchmark_results")
+# projections: all columns and the one used by test_read_parquet_file.py
+PROJECTIONS = {"all": None, "date_value": ["date", "value"]}
+CACHE_STATES = ["cold", "warm"]
+# Layouts (see synthetic_parquet_files/catalog.parquet) to benchmark, None: all layouts in the catalog
+LAYOUTS: list[str] | None = None
+# Layout the others are compared to, e.g. the fixed-size/float32 layouts (see create_parquet_files.py) to the list one
+BASELINE_LAYOUT = "pandas"
+
+ENGINES = {
+    "polars_rust": partial(pl.read_parquet, use_pyarrow=False),
+    "polars_pyarrow": partial(pl.read_parquet, use_pyarrow=True),
+    "pandas_pyarrow": partial(pd.read_parquet, engine="pyarrow"),
+}
+if find_spec("fastparquet") is not None:
+    ENGINES["pandas_fastparquet"] = partial(pd.read_parquet, engine="fastparquet")
+
+
+def drop_page_cache(path_file: Path) -> None:
+    """Evict the (clean) pages of the file from the page cache, no root privileges needed."""
+    fd = os.open(path_file, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def decoded_nbytes(df: pl.DataFrame | pd.DataFrame) -> int:
+    """Size of the decoded data, list columns count their values only."""
+    if isinstance(df, pl.DataFrame):
+        return int(df.estimated_size())
+    nbytes = 0
+    for col in df.columns:
+        if df[col].dtype == object:
+            nbytes += sum(row.nbytes for row in list_column_rows(df[col]))
+        else:
+            nbytes += df[col].to_numpy().nbytes
+    return nbytes
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def benchmark_read(
+    engine: str, path_file: Path, columns: list[str] | None, cache_state: str, num_reps: int
+) -> dict[str, Any]:
+    """Time `num_reps` reads of one file with one engine. Runs in a fresh process, so ru_maxrss is its own peak."""
+    read_parquet_file = ENGINES[engine]
+    rss_start_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if cache_state == "warm":
+        # fills the page cache and runs one-off initialisations of the engine
+        read_parquet_file(path_file, columns=columns)
+
+    latencies = []
+    cpu_times = []
+    nbytes = 0
+    for _ in range(num_reps):
+        if cache_state == "cold":
+            drop_page_cache(path_file)
+        cpu_start = cpu_seconds()
+        time_start = time.perf_counter()
+        df = read_parquet_file(path_file, columns=columns)
+        latencies.append(time.perf_counter() - time_start)
+        cpu_times.append(cpu_seconds() - cpu_start)
+        nbytes = decoded_nbytes(df)
+        del df
+
+    latencies = np.array(latencies)
+    return {
+        "engine": engine,
+        "path_file": str(path_file),
+        "file_num_bytes": path_file.stat().st_size,
+        "columns": columns,
+        "cache_state": cache_state,
+        "num_reps": num_reps,
+        "decoded_num_bytes": nbytes,
+        "throughput_gb_per_s": nbytes * num_reps / latencies.sum() / 1e9,
+        "latency_s_p50": float(np.percentile(latencies, 50)),
+        "latency_s_p95": float(np.percentile(latencies, 95)),
+        "latency_s_p99": float(np.percentile(latencies, 99)),
+        "latency_s_mean": float(latencies.mean()),
+        "cpu_utilisation": float(np.sum(cpu_times) / latencies.sum()),
+        "rss_before_reads_mb": rss_start_mb,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_benchmarks(
+    paths_parquet_files: list[Path],
+    engines: list[str],
+    projections: dict[str, list[str] | None],
+    cache_states: list[str],
+    num_reps: int,
+) -> list[dict[str, Any]]:
+    cells = [
+        (engine, path_file, columns, cache_state)
+        for path_file in paths_parquet_files
+        for engine in engines
+        for columns in projections.values()
+        for cache_state in cache_states
+    ]
+    results = []
+    for engine, path_file, columns, cache_state in tqdm(cells, desc="Benchmarking"):
+        # one process per cell, so memory and engine state of one cell do not leak into the next
+        with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+            result = executor.submit(benchmark_read, engine, path_file, columns, cache_state, num_reps).result()
+        tqdm.write(
+            f"{engine:>20} {cache_state:>4} {columns!s:>20} {path_file}: {result['throughput_gb_per_s']:.2f} GB/s, "
+            f"p50 {result['latency_s_p50'] * 1000:.0f} ms, peak RSS {result['peak_rss_mb']:.0f} MB"
+        )
+        results.append(result)
+    return results
+
+
+def compare_layouts(results: list[dict[str, Any]], baseline_layout: str) -> pl.DataFrame:
+    """Median file size, decoded size, latency and peak RSS of every layout relative to `baseline_layout`."""
+    keys = ["engine", "projection", "cache_state"]
+    metrics = ["file_num_bytes", "decoded_num_bytes", "latency_s_p50", "peak_rss_mb"]
+    df = pl.DataFrame(results).with_columns(projection=pl.col("columns").list.join(",").fill_null("all"))
+    per_layout = df.group_by(["layout", *keys]).agg(pl.col(metrics).median())
+    baseline = per_layout.filter(pl.col("layout") == baseline_layout).drop("layout")
+    return (
+        per_layout.join(baseline, on=keys, suffix="_baseline")
+        .select("layout", *keys, *[(pl.col(m) / pl.col(f"{m}_baseline")).alias(f"{m}_ratio") for m in metrics])
+        .sort("layout", *keys)
+    )
+
+
+if __name__ == "__main__":
+    catalog = read_catalog(DIR_PARQUET_FILES)
+    if LAYOUTS is not None:
+        catalog = catalog.filter(pl.col("layout").is_in(LAYOUTS))
+    paths_parquet_files = [Path(p) for p in catalog["path"]]
+    results = run_benchmarks(paths_parquet_files, list(ENGINES), PROJECTIONS, CACHE_STATES, NUM_REPS)
+    # add the layout of each file, so results can be grouped by writer options
+    layouts = {
+        path: {"layout": layout, "writer": writer, "writer_options": writer_options}
+        for path, layout, writer, writer_options in catalog.select("path", "layout", "writer", "writer_options").rows()
+    }
+    results = [{**result, **layouts[result["path_file"]]} for result in results]
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    path_results = OUTPUT_DIR / f"benchmark_{datetime.now():%Y%m%dT%H%M%S}.json"
+    path_results.write_text(
+        json.dumps(
+            {
+                "library_versions": library_versions(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {path_results}")
+
+    if BASELINE_LAYOUT in catalog["layout"]:
+        with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=200):
+            print(f"Relative to layout {BASELINE_LAYOUT}:")
+            print(compare_layouts(results, BASELINE_LAYOUT))
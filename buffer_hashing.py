@@ -0,0 +1,105 @@
+"""
+Hashing of list[float] columns directly on their value buffers.
+
+Every row is digested from the raw bytes of its float values (no text formatting, no copies), giving one 64-bit
+digest per row plus a combined digest over all rows. The digests only depend on the values, so a polars read and a
+pandas/pyarrow read of the same data produce the same digests.
+
+The files can carry these digests in a column next to each list column (see CHECKSUM_COLUMNS in
+create_parquet_files.py), so that a single read can be verified on its own with `verify_row_digests`.
+"""
+
+import hashlib
+from itertools import pairwise
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+# sha256 is hardware accelerated on current x86/ARM CPUs and releases the GIL while hashing large buffers
+HASH_NAME = "sha256"
+
+
+def list_column_rows(column: pl.Series | pd.Series | pa.Array | pa.ChunkedArray) -> list[np.ndarray]:
+    """Zero-copy views of the values of every row of a list column (variable or fixed-size lists)."""
+    if isinstance(column, pl.Series):
+        column = column.to_arrow()
+    elif isinstance(column, pd.Series):
+        if column.dtype == object:
+            # pyarrow engine: one numpy array (a view into the arrow buffer) per row
+            return [np.asarray(row) for row in column.to_numpy()]
+        column = pa.array(column)
+
+    chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+    rows = []
+    for chunk in chunks:
+        if pa.types.is_fixed_size_list(chunk.type):
+            rows += list(fixed_size_list_values_2d(chunk))
+            continue
+        # offsets of a sliced list array are absolute positions in its (unsliced) values array
+        offsets = chunk.offsets.to_numpy()
+        values = chunk.values.to_numpy(zero_copy_only=True)
+        rows += [values[start:stop] for start, stop in pairwise(offsets)]
+    return rows
+
+
+def fixed_size_list_values_2d(chunk: pa.FixedSizeListArray) -> np.ndarray:
+    """Zero-copy (rows, list size) view of the values of a fixed-size list array, there are no offsets to slice by."""
+    values = chunk.values.to_numpy(zero_copy_only=True).reshape(-1, chunk.type.list_size)
+    # the values of a sliced array are not sliced, its rows start at its offset
+    return values[chunk.offset : chunk.offset + len(chunk)]
+
+
+def is_list_column(column: pl.Series | pd.Series | pa.Array | pa.ChunkedArray) -> bool:
+    if isinstance(column, pa.Array | pa.ChunkedArray):
+        return (
+            pa.types.is_list(column.type)
+            or pa.types.is_large_list(column.type)
+            or pa.types.is_fixed_size_list(column.type)
+        )
+    if isinstance(column, pl.Series):
+        return isinstance(column.dtype, pl.List | pl.Array)
+    if isinstance(column.dtype, pd.ArrowDtype):
+        return column.dtype.pyarrow_dtype.num_fields == 1
+    return column.dtype == object and len(column) > 0 and isinstance(column.iloc[0], np.ndarray | list)
+
+
+def column_rows(column: pl.Series | pd.Series | pa.Array | pa.ChunkedArray) -> list[np.ndarray]:
+    """Rows of a list column, a scalar column (e.g. `date`) is treated as a single row."""
+    if is_list_column(column):
+        return list_column_rows(column)
+    return [column.to_numpy()]
+
+
+def hash_row(row: np.ndarray) -> np.uint64:
+    return np.frombuffer(hashlib.new(HASH_NAME, np.ascontiguousarray(row)).digest()[:8], dtype=np.uint64)[0]
+
+
+def column_row_digests(column: pl.Series | pd.Series | pa.Array | pa.ChunkedArray) -> np.ndarray:
+    return np.array([hash_row(row) for row in column_rows(column)], dtype=np.uint64)
+
+
+def row_digests(df: pl.DataFrame | pd.DataFrame, col_to_check: str) -> np.ndarray:
+    """One 64-bit digest per row of the list column `col_to_check` (a single one for a scalar column)."""
+    return column_row_digests(df[col_to_check])
+
+
+def digest_column(col: str) -> str:
+    """Name of the column holding the embedded digests of the rows of the list column `col`."""
+    return f"{col}_digest"
+
+
+def verify_row_digests(df: pl.DataFrame | pd.DataFrame, col: str, digests: np.ndarray | None = None) -> np.ndarray:
+    """
+    Indices of the rows of `col` that do not match the digests read with them from `digest_column(col)`, empty for
+    an intact read. Needs neither a second read nor reference data; every changed bit is detected. `digests` are the
+    row digests of `col` if they are already computed.
+    """
+    digests = row_digests(df, col) if digests is None else digests
+    return np.flatnonzero(digests != np.asarray(df[digest_column(col)].to_numpy(), dtype=np.uint64))
+
+
+def combined_digest(digests: np.ndarray) -> str:
+    """Digest over all row digests (in row order), one value identifying the data of a whole read."""
+    return hashlib.new(HASH_NAME, np.ascontiguousarray(digests, dtype=np.uint64)).hexdigest()
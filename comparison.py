@@ -0,0 +1,59 @@
+"""
+Tolerance comparison of the rows of DataFrame columns on their value buffers.
+
+Rows are compared as zero-copy views of the underlying buffers (see `buffer_hashing.list_column_rows`), chunk by
+chunk: a chunk that is bitwise identical is skipped without further work, only chunks that differ are checked with
+`np.isclose`. Temporary memory is bounded by the chunk size, independent of the length of the rows.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+# Number of elements compared at once
+CHUNK_SIZE = 1 << 18
+
+
+def _bitwise_view(values: np.ndarray) -> np.ndarray:
+    return values.view(f"u{values.itemsize}") if values.dtype.kind == "f" else values
+
+
+def find_mismatches(
+    rows_1: Sequence[np.ndarray],
+    rows_2: Sequence[np.ndarray],
+    rtol: float,
+    atol: float,
+    rows: Sequence[int] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (row index, element index) pairs of all elements of `rows_1` that are not close to `rows_2`.
+    Only the row indices in `rows` are compared (default: all). Bitwise identical values (incl. NaN) are equal.
+    """
+    rows = range(len(rows_1)) if rows is None else rows
+    row_indices = []
+    element_indices = []
+
+    for row_index in rows:
+        data_1 = rows_1[row_index]
+        data_2 = rows_2[row_index]
+        if len(data_1) != len(data_2):
+            raise ValueError("Lengths differ")
+
+        for start in range(0, len(data_1), chunk_size):
+            chunk_1 = data_1[start : start + chunk_size]
+            chunk_2 = data_2[start : start + chunk_size]
+            if np.array_equal(_bitwise_view(chunk_1), _bitwise_view(chunk_2)):
+                continue
+
+            if chunk_1.dtype.kind in "biuf":
+                mask = ~np.isclose(chunk_1, chunk_2, rtol=rtol, atol=atol, equal_nan=True)
+            else:
+                mask = chunk_1 != chunk_2
+            indices = start + np.flatnonzero(mask)
+            row_indices.append(np.full(len(indices), row_index, dtype=np.int64))
+            element_indices.append(indices)
+
+    if not row_indices:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(row_indices), np.concatenate(element_indices)
@@ -1,114 +1,493 @@
 # %%
+import itertools
 import os
+import resource
 import shutil
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 import pandas as pd
 import polars as pl
+import pyarrow as pa
 import pyarrow.parquet as pq
 from tqdm import tqdm
 
+from buffer_hashing import column_row_digests, digest_column
+from parquet_manifest import (
+    config_hash,
+    generation_is_cached,
+    library_versions,
+    read_manifest,
+    record_file,
+    write_catalog,
+    write_manifest,
+)
+
 # Configuration
 NUM_FILES = 1
 ENTRIES_PER_FILE = 20
 LIST_LENGTH = 1_500_000
 OUTPUT_DIR = Path("./synthetic_parquet_files")
 cache = True
+# Bump whenever the generated data or the writer calls change, so that cached files are regenerated
+GENERATOR_VERSION = 1
+# Number of worker processes generating files in parallel (1 = serial, in this process)
+NUM_WORKERS = min(os.cpu_count() or 1, NUM_FILES)
+# Cap on the address space of each worker process in GB (None = no cap)
+MAX_WORKER_MEMORY_GB: float | None = None
+# Streaming writer: entries per row group, generated and written one row group at a time (None = single-shot write)
+ROW_GROUP_SIZE: int | None = None
+# Target size of a data page in bytes, for both writers (None = pyarrow default of 1 MB)
+DATA_PAGE_SIZE: int | None = None
+# Per-row checksum columns `value_digest`/`value2_digest`: the 64-bit digest of the values of each row (as computed by
+# buffer_hashing.row_digests), so a single read can be verified on its own (see buffer_hashing.verify_row_digests)
+CHECKSUM_COLUMNS = False
+# Writer/layout matrix: the same data written with every combination of the options of a writer, one folder per
+# combination ("layout") next to the pandas and polars folders. Compression is given as (codec, level).
+GENERATE_LAYOUT_MATRIX = False
+LAYOUT_MATRIX = {
+    "polars": {
+        "compression": [("zstd", None), ("zstd", 9), ("snappy", None), ("lz4", None), ("uncompressed", None)],
+        "statistics": [True, False],
+        "data_page_size": [None, 64 * 1024],
+        "row_group_size": [None, 5],
+    },
+    "pyarrow": {
+        "version": ["1.0", "2.6"],
+        "compression": [("snappy", None), ("zstd", None), ("zstd", 9), ("uncompressed", None)],
+        "data_page_version": ["1.0", "2.0"],
+        "use_dictionary": [True, False],
+        "write_statistics": [True, False],
+        "data_page_size": [None, 64 * 1024],
+        "row_group_size": [None, 5],
+    },
+}
+# Compact storage: `value`/`value2` as fixed-size lists of LIST_LENGTH elements (polars pl.Array, arrow
+# FixedSizeList, no offsets), as float64 or float32. Written as additional layouts with the default codec of the writer.
+GENERATE_FIXED_SIZE_LAYOUTS = False
+FIXED_SIZE_LAYOUTS = [
+    {"writer": writer, "compression": compression, "list_type": "fixed_size", "float_type": float_type}
+    for writer, compression in [("polars", ("zstd", None)), ("pyarrow", ("snappy", None))]
+    for float_type in ["float64", "float32"]
+]
+# Layouts written by one worker task, the data of a file is generated once per task
+LAYOUTS_PER_TASK = 8
 # Create output directory
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-# Function to generate a single parquet file
-def generate_parquet_file(file_idx: int, cache: bool) -> tuple[Path, Path]:
-    file_path_pandas = OUTPUT_DIR / "pandas" / f"data_{file_idx:03d}.parquet"
-    file_path_polars = OUTPUT_DIR / "polars" / f"data_{file_idx:03d}.parquet"
+# Function to generate the signal of a single entry
+def generate_signal(file_idx: int, entry_idx: int, out: np.ndarray) -> None:
+    # Use a deterministic seed based on file and entry index for reproducibility.
+    # Each entry gets its own generator (same stream as np.random.seed), so files can be generated in parallel.
+    seed = file_idx * 1000 + entry_idx
+    rng = np.random.RandomState(seed)
+
+    # Generate array with some patterns to make it more realistic:
+    # - Base signal: sine wave with random frequency
+    # - Add some noise
+    # - Add occasional spikes
+
+    x = np.linspace(0, 10 * np.pi, LIST_LENGTH)
+    freq = 0.5 + rng.random_sample() * 2  # Random frequency between 0.5 and 2.5
+    base_signal = np.sin(freq * x) * 10
+    noise = rng.normal(0, 1, LIST_LENGTH)
+
+    # Add occasional spikes (about 0.1% of points)
+    spike_mask = rng.random_sample(LIST_LENGTH) < 0.001
+    spikes = np.zeros(LIST_LENGTH)
+    spikes[spike_mask] = (rng.random_sample(spike_mask.sum()) * 40) - 20  # Spikes between -20 and 20
+
+    # Combine components, written straight into the row of the flat buffer
+    np.add(base_signal, noise, out=out)
+    out += spikes
+
+
+def list_array_from_flat(flat_values: np.ndarray, list_length: int) -> pa.ListArray:
+    """Wrap a contiguous float64 buffer as an Arrow list array of rows with `list_length` elements each."""
+    num_rows = len(flat_values) // list_length
+    offsets = pa.array(np.arange(0, (num_rows + 1) * list_length, list_length, dtype=np.int32))
+    return pa.ListArray.from_arrays(offsets, pa.array(flat_values, type=pa.float64()))
 
-    if file_path_pandas.exists() and file_path_polars.exists() and cache:
-        return file_path_pandas, file_path_polars
+
+# Schema (incl. the pandas metadata) that df.to_parquet writes for this data, so the pandas file stays unchanged
+PANDAS_SCHEMA = pa.Schema.from_pandas(
+    pd.DataFrame({"date": [0], "value": [[0.0]], "value2": [[0.0]]}), preserve_index=False
+)
+# Schema that pl.DataFrame.to_arrow() hands to pyarrow in write_parquet(use_pyarrow=True)
+POLARS_SCHEMA = (
+    pl.DataFrame(schema={"date": pl.Int64, "value": pl.List(pl.Float64), "value2": pl.List(pl.Float64)})
+    .to_arrow()
+    .schema
+)
+# The same schemas with the per-row checksum columns
+DIGEST_COLUMNS = [digest_column(col) for col in ["value", "value2"]]
+PANDAS_SCHEMA_CHECKSUMS = pa.Schema.from_pandas(
+    pd.DataFrame(
+        {"date": [0], "value": [[0.0]], "value2": [[0.0]], **{col: np.zeros(1, np.uint64) for col in DIGEST_COLUMNS}}
+    ),
+    preserve_index=False,
+)
+POLARS_SCHEMA_CHECKSUMS = (
+    pl.DataFrame(
+        schema={
+            "date": pl.Int64,
+            "value": pl.List(pl.Float64),
+            "value2": pl.List(pl.Float64),
+            **{col: pl.UInt64 for col in DIGEST_COLUMNS},
+        }
+    )
+    .to_arrow()
+    .schema
+)
+# Compression polars uses by default in write_parquet
+POLARS_COMPRESSION = "zstd"
+
+
+def generate_arrow_table(file_idx: int, entries: range | None = None, checksum_columns: bool = False) -> pa.Table:
+    """Generate the given entries (default: all ENTRIES_PER_FILE) of a file, optionally with checksum columns."""
+    entries = range(ENTRIES_PER_FILE) if entries is None else entries
 
     # Create start date (each file will have consecutive dates)
     start_date = datetime(2023, 1, 1) + timedelta(days=file_idx * ENTRIES_PER_FILE)
 
     # Generate dates
     start_unix_time = int(start_date.timestamp())
-    dates = [start_unix_time + (i * 86400) for i in range(ENTRIES_PER_FILE)]
-
-    # Generate values - each is a list of 1.5M floats
-    values = []
-    for i in range(ENTRIES_PER_FILE):
-        # Use a deterministic seed based on file and entry index for reproducibility
-        seed = file_idx * 1000 + i
-        np.random.seed(seed)
-
-        # Generate array with some patterns to make it more realistic:
-        # - Base signal: sine wave with random frequency
-        # - Add some noise
-        # - Add occasional spikes
-
-        x = np.linspace(0, 10 * np.pi, LIST_LENGTH)
-        freq = 0.5 + np.random.random() * 2  # Random frequency between 0.5 and 2.5
-        base_signal = np.sin(freq * x) * 10
-        noise = np.random.normal(0, 1, LIST_LENGTH)
-
-        # Add occasional spikes (about 0.1% of points)
-        spike_mask = np.random.random(LIST_LENGTH) < 0.001
-        spikes = np.zeros(LIST_LENGTH)
-        spikes[spike_mask] = (np.random.random(sum(spike_mask)) * 40) - 20  # Spikes between -20 and 20
-
-        # Combine components
-        signal = base_signal + noise + spikes
-        values.append(signal.tolist())
-
-    # Create pandas DataFrame
-    df = pd.DataFrame({"date": dates, "value": values, "value2": (10 * np.asarray(values)).tolist()})
-
-    # Save to parquet
-    file_path_pandas.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(file_path_pandas, index=False)
+    dates = start_unix_time + np.asarray(entries, dtype=np.int64) * 86400
+
+    # Generate values - each is a list of 1.5M floats, all entries share one contiguous buffer
+    values = np.empty((len(entries), LIST_LENGTH), dtype=np.float64)
+    for row, i in enumerate(entries):
+        generate_signal(file_idx, i, out=values[row])
+
+    values = values.reshape(-1)
+    columns = [
+        pa.array(dates),
+        list_array_from_flat(values, LIST_LENGTH),
+        list_array_from_flat(10 * values, LIST_LENGTH),
+    ]
+    if checksum_columns:
+        columns += [pa.array(column_row_digests(column)) for column in columns[1:]]
+    return pa.Table.from_arrays(columns, schema=PANDAS_SCHEMA_CHECKSUMS if checksum_columns else PANDAS_SCHEMA)
+
+
+def write_parquet_files_streaming(
+    file_idx: int,
+    file_path_pandas: Path,
+    file_path_polars: Path,
+    row_group_size: int,
+    data_page_size: int | None,
+    checksum_columns: bool = False,
+) -> None:
+    """
+    Generate and write a file one row group at a time, so only `row_group_size` entries are in memory.
+    Both the pandas and the polars flavoured file are written from the same pass over the generated data.
+    """
+    schema_pandas = PANDAS_SCHEMA_CHECKSUMS if checksum_columns else PANDAS_SCHEMA
+    schema_polars = POLARS_SCHEMA_CHECKSUMS if checksum_columns else POLARS_SCHEMA
+    with (
+        pq.ParquetWriter(file_path_pandas, schema_pandas, data_page_size=data_page_size) as writer_pandas,
+        pq.ParquetWriter(
+            file_path_polars, schema_polars, compression=POLARS_COMPRESSION, data_page_size=data_page_size
+        ) as writer_polars,
+    ):
+        for start in range(0, ENTRIES_PER_FILE, row_group_size):
+            entries = range(start, min(start + row_group_size, ENTRIES_PER_FILE))
+            table = generate_arrow_table(file_idx, entries, checksum_columns)
+            writer_pandas.write_table(table)
+            # list -> large_list only widens the offsets, the float buffers are shared
+            writer_polars.write_table(table.cast(schema_polars))
 
+
+def generation_config(
+    file_idx: int, row_group_size: int | None, data_page_size: int | None, checksum_columns: bool = False
+) -> dict[str, Any]:
+    """Everything the content of a generated file depends on, recorded in the manifest."""
+    # checksum_columns is only recorded when set, files without them keep the config they were cached with
+    checksums = {"checksum_columns": True} if checksum_columns else {}
+    return {
+        **checksums,
+        "generator_version": GENERATOR_VERSION,
+        "file_idx": file_idx,
+        "entries_per_file": ENTRIES_PER_FILE,
+        "list_length": LIST_LENGTH,
+        "seeds": "RandomState(file_idx * 1000 + entry_idx)",
+        "row_group_size": row_group_size,
+        "data_page_size": data_page_size,
+        "library_versions": library_versions(),
+    }
+
+
+def parquet_file_paths(file_idx: int) -> tuple[Path, Path]:
+    return (
+        OUTPUT_DIR / "pandas" / f"data_{file_idx:03d}.parquet",
+        OUTPUT_DIR / "polars" / f"data_{file_idx:03d}.parquet",
+    )
+
+
+# Function to generate a single parquet file
+def generate_parquet_file(
+    file_idx: int,
+    cache: bool,
+    row_group_size: int | None = None,
+    data_page_size: int | None = None,
+    checksum_columns: bool = False,
+) -> tuple[Path, Path]:
+    file_path_pandas, file_path_polars = parquet_file_paths(file_idx)
+
+    config = generation_config(file_idx, row_group_size, data_page_size, checksum_columns)
+    paths = [file_path_pandas, file_path_polars]
+    if cache and generation_is_cached(read_manifest(OUTPUT_DIR), OUTPUT_DIR, paths, config):
+        return file_path_pandas, file_path_polars
+
+    file_path_pandas.parent.mkdir(parents=True, exist_ok=True)
     file_path_polars.parent.mkdir(parents=True, exist_ok=True)
-    pl.from_pandas(df).write_parquet(file_path_polars, use_pyarrow=True)
 
+    if row_group_size is not None:
+        write_parquet_files_streaming(
+            file_idx, file_path_pandas, file_path_polars, row_group_size, data_page_size, checksum_columns
+        )
+    else:
+        table = generate_arrow_table(file_idx, checksum_columns=checksum_columns)
+
+        # Save to parquet, same writer calls as df.to_parquet(index=False) and pl.from_pandas(df).write_parquet(...)
+        pq.write_table(table, file_path_pandas, data_page_size=data_page_size)
+        pl.from_arrow(table.replace_schema_metadata()).write_parquet(
+            file_path_polars, use_pyarrow=True, pyarrow_options={"data_page_size": data_page_size}
+        )
+
+    if cache:
+        # generate_parquet_files records the files of its workers itself and calls this without cache
+        manifest = read_manifest(OUTPUT_DIR)
+        for path in paths:
+            record_file(manifest, OUTPUT_DIR, path, config)
+        write_manifest(OUTPUT_DIR, manifest)
     return file_path_pandas, file_path_polars
 
 
-# Generate all files with progress bar
-print(f"Generating {NUM_FILES} parquet files with {ENTRIES_PER_FILE} entries each...")
-print(f"Each entry contains a list of {LIST_LENGTH:,} floats")
-print(f"Output directory: {OUTPUT_DIR}")
-
-# Calculate approximate size
-single_list_size_mb = LIST_LENGTH * 4 / (1024 * 1024)  # 4 bytes per float
-total_size_gb = NUM_FILES * ENTRIES_PER_FILE * single_list_size_mb / 1024
-print(f"Estimated total size: {total_size_gb:.2f} GB (uncompressed)")
-
-# Confirm before proceeding
-confirmation = print(f"This will generate approximately {total_size_gb:.2f} GB of data.")
-
-# Generate files with progress bar
-file_paths = {"pandas": [], "polars": []}
-
-for i in tqdm(range(NUM_FILES), desc="Generating files"):
-    (file_path_pandas, file_path_polars) = generate_parquet_file(i, cache=cache)
-    file_paths["pandas"].append(file_path_pandas)
-    file_paths["polars"].append(file_path_polars)
-
-for key, paths in file_paths.items():
-    print("\n########################################################")
-    print(f"{key}")
-    print("########################################################")
-    print(f"\nGenerated {len(paths)} parquet files in {OUTPUT_DIR}")
-
-    # Verify one file to confirm structure
-    print("\nVerifying structure of first file...")
-    test_df = pd.read_parquet(paths[0])
-    print(f"Shape: {test_df.shape}")
-    print(f"Columns: {test_df.columns.tolist()}")
-    print(f"First date: {test_df['date'].iloc[0]}")
-    print(f"Length of first value array: {len(test_df['value'].iloc[0])}")
-
-    # Check original file
-    meta = pq.read_metadata(paths[0])
-    print(meta)
+def _limit_worker_memory(max_memory_gb: float | None) -> None:
+    if max_memory_gb is not None:
+        max_bytes = int(max_memory_gb * 1024**3)
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, max_bytes))
+
+
+def _run_tasks(
+    fun: Callable[..., Any],
+    tasks: dict[Any, tuple[Any, ...]],
+    num_workers: int,
+    max_worker_memory_gb: float | None,
+    desc: str,
+) -> Iterator[tuple[Any, Any]]:
+    """Yield (key, fun(*args)) for all tasks, in order of completion when run in parallel."""
+    if num_workers <= 1:
+        for key, args in tqdm(tasks.items(), desc=desc):
+            yield key, fun(*args)
+        return
+
+    # one task per worker process before it is replaced, so memory is handed back to the OS after each task
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        max_tasks_per_child=1,
+        initializer=_limit_worker_memory,
+        initargs=(max_worker_memory_gb,),
+    ) as executor:
+        futures = {executor.submit(fun, *args): key for key, args in tasks.items()}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=f"{desc} ({num_workers} workers)"):
+            yield futures[future], future.result()
+
+
+def generate_parquet_files(
+    num_files: int,
+    cache: bool,
+    num_workers: int = 1,
+    max_worker_memory_gb: float | None = None,
+    row_group_size: int | None = None,
+    data_page_size: int | None = None,
+    checksum_columns: bool = False,
+) -> dict[str, list[Path]]:
+    """
+    Generate files 0..num_files-1, in parallel if num_workers > 1. The output does not depend on num_workers.
+    With cache, only files whose generation config differs from the one recorded in the manifest are rebuilt.
+    """
+    manifest = read_manifest(OUTPUT_DIR)
+    configs = {i: generation_config(i, row_group_size, data_page_size, checksum_columns) for i in range(num_files)}
+    to_generate = [
+        i
+        for i in range(num_files)
+        if not (cache and generation_is_cached(manifest, OUTPUT_DIR, list(parquet_file_paths(i)), configs[i]))
+    ]
+    print(f"{num_files - len(to_generate)} of {num_files} files are up to date, generating {len(to_generate)}")
+
+    tasks = {i: (i, False, row_group_size, data_page_size, checksum_columns) for i in to_generate}
+    for i, paths in _run_tasks(generate_parquet_file, tasks, num_workers, max_worker_memory_gb, "Generating files"):
+        # keep the manifest current after every file, so an interrupted run only redoes unfinished files
+        for path in paths:
+            record_file(manifest, OUTPUT_DIR, path, configs[i])
+        write_manifest(OUTPUT_DIR, manifest)
+
+    file_paths = {"pandas": [], "polars": []}
+    for i in range(num_files):
+        file_path_pandas, file_path_polars = parquet_file_paths(i)
+        file_paths["pandas"].append(file_path_pandas)
+        file_paths["polars"].append(file_path_polars)
+
+    return file_paths
+
+
+def layout_variants(layout_matrix: dict[str, dict[str, list[Any]]]) -> list[dict[str, Any]]:
+    """All combinations of the options of every writer."""
+    variants = []
+    for writer, options in layout_matrix.items():
+        for values in itertools.product(*options.values()):
+            variants.append({"writer": writer, **dict(zip(options, values))})
+    return variants
+
+
+def layout_name(variant: dict[str, Any]) -> str:
+    return f"{variant['writer']}_{config_hash(variant)[:12]}"
+
+
+def layout_file_path(file_idx: int, variant: dict[str, Any]) -> Path:
+    return OUTPUT_DIR / layout_name(variant) / f"data_{file_idx:03d}.parquet"
+
+
+def storage_schema(schema: pa.Schema, list_type: str, float_type: str) -> pa.Schema:
+    """`schema` with `value`/`value2` as variable-length ("list") or "fixed_size" lists of `float_type`."""
+    element_type = pa.from_numpy_dtype(np.dtype(float_type))
+    value_type = pa.list_(element_type, LIST_LENGTH if list_type == "fixed_size" else -1)
+    return pa.schema([pa.field(f.name, value_type) if f.name in ["value", "value2"] else f for f in schema])
+
+
+def write_layout_variant(table: pa.Table, path: Path, variant: dict[str, Any]) -> None:
+    options = {name: value for name, value in variant.items() if name != "writer"}
+    codec, level = options.pop("compression")
+    list_type = options.pop("list_type", "list")
+    float_type = options.pop("float_type", "float64")
+    # no pandas metadata, all variants hold the same plain arrow schema
+    table = table.replace_schema_metadata()
+    if (list_type, float_type) != ("list", "float64"):
+        table = table.cast(storage_schema(table.schema, list_type, float_type))
+    if float_type != "float64" and DIGEST_COLUMNS[0] in table.column_names:
+        # the checksums are those of the stored values
+        for col, name in zip(["value", "value2"], DIGEST_COLUMNS):
+            table = table.set_column(table.schema.get_field_index(name), name, pa.array(column_row_digests(table[col])))
+
+    if variant["writer"] == "polars":
+        pl.from_arrow(table).write_parquet(path, compression=codec, compression_level=level, **options)  # type: ignore
+    elif variant["writer"] == "pyarrow":
+        codec = "none" if codec == "uncompressed" else codec
+        pq.write_table(table, path, compression=codec, compression_level=level, **options)
+    else:
+        raise ValueError(f"Unknown writer {variant['writer']}")
+
+
+def generate_layout_variants(
+    file_idx: int, variants: list[dict[str, Any]], checksum_columns: bool = False
+) -> list[Path]:
+    """Generate the data of a file once and write it in all given layouts."""
+    table = generate_arrow_table(file_idx, checksum_columns=checksum_columns)
+    paths = []
+    for variant in variants:
+        path = layout_file_path(file_idx, variant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_layout_variant(table, path, variant)
+        paths.append(path)
+    return paths
+
+
+def generate_layout_matrix(
+    num_files: int,
+    variants: list[dict[str, Any]],
+    cache: bool,
+    num_workers: int = 1,
+    max_worker_memory_gb: float | None = None,
+    checksum_columns: bool = False,
+) -> list[Path]:
+    """Write files 0..num_files-1 in every layout of `variants`, layouts up to date in the manifest are skipped."""
+    manifest = read_manifest(OUTPUT_DIR)
+
+    configs = {}
+    tasks = {}
+    for i in range(num_files):
+        to_generate = []
+        for variant in variants:
+            config = {**generation_config(i, None, None, checksum_columns), "layout": variant}
+            configs[layout_file_path(i, variant)] = config
+            if not (cache and generation_is_cached(manifest, OUTPUT_DIR, [layout_file_path(i, variant)], config)):
+                to_generate.append(variant)
+        for start in range(0, len(to_generate), LAYOUTS_PER_TASK):
+            tasks[(i, start)] = (i, to_generate[start : start + LAYOUTS_PER_TASK], checksum_columns)
+    num_to_generate = sum(len(variants_task) for _, variants_task, _ in tasks.values())
+    num_up_to_date = len(configs) - num_to_generate
+    print(f"{num_up_to_date} of {len(configs)} layout files are up to date, generating {num_to_generate}")
+
+    for _, paths in _run_tasks(generate_layout_variants, tasks, num_workers, max_worker_memory_gb, "Writing layouts"):
+        for path in paths:
+            record_file(manifest, OUTPUT_DIR, path, configs[path])
+        write_manifest(OUTPUT_DIR, manifest)
+
+    return list(configs)
+
+
+if __name__ == "__main__":
+    # Generate all files with progress bar
+    print(f"Generating {NUM_FILES} parquet files with {ENTRIES_PER_FILE} entries each...")
+    print(f"Each entry contains a list of {LIST_LENGTH:,} floats")
+    print(f"Output directory: {OUTPUT_DIR}")
+
+    # Calculate approximate size
+    single_list_size_mb = LIST_LENGTH * 8 / (1024 * 1024)  # 8 bytes per float64
+    total_size_gb = NUM_FILES * ENTRIES_PER_FILE * single_list_size_mb / 1024
+    print(f"Estimated total size: {total_size_gb:.2f} GB (uncompressed)")
+
+    # Confirm before proceeding
+    confirmation = print(f"This will generate approximately {total_size_gb:.2f} GB of data.")
+
+    # Generate files with progress bar
+    file_paths = generate_parquet_files(
+        NUM_FILES,
+        cache=cache,
+        num_workers=NUM_WORKERS,
+        max_worker_memory_gb=MAX_WORKER_MEMORY_GB,
+        row_group_size=ROW_GROUP_SIZE,
+        data_page_size=DATA_PAGE_SIZE,
+        checksum_columns=CHECKSUM_COLUMNS,
+    )
+
+    variants = layout_variants(LAYOUT_MATRIX) if GENERATE_LAYOUT_MATRIX else []
+    variants += FIXED_SIZE_LAYOUTS if GENERATE_FIXED_SIZE_LAYOUTS else []
+    if variants:
+        generate_layout_matrix(
+            NUM_FILES,
+            variants,
+            cache=cache,
+            num_workers=NUM_WORKERS,
+            max_worker_memory_gb=MAX_WORKER_MEMORY_GB,
+            checksum_columns=CHECKSUM_COLUMNS,
+        )
+
+    # Catalog of all files with their layout, iterated over by the read checks and the benchmark
+    catalog = write_catalog(OUTPUT_DIR)
+    print(f"Catalog of {catalog.height} files written")
+
+    for key, paths in file_paths.items():
+        print("\n########################################################")
+        print(f"{key}")
+        print("########################################################")
+        print(f"\nGenerated {len(paths)} parquet files in {OUTPUT_DIR}")
+
+        # Verify one file to confirm structure
+        print("\nVerifying structure of first file...")
+        test_df = pd.read_parquet(paths[0])
+        print(f"Shape: {test_df.shape}")
+        print(f"Columns: {test_df.columns.tolist()}")
+        print(f"First date: {test_df['date'].iloc[0]}")
+        print(f"Length of first value array: {len(test_df['value'].iloc[0])}")
+
+        # Check original file
+        meta = pq.read_metadata(paths[0])
+        print(meta)
@@ -0,0 +1,190 @@
+"""
+Resumable runner of the read checks, driven by a TOML config file (see experiment_config.toml).
+
+The experiment is a matrix of cells (layout, engine, number of workers, file). Cells are run in rounds of
+`reps_per_batch` repetitions, so all cells progress together as in the original `rep_full` loop. After every batch its
+results are appended to the results store and the cell's progress is written to a checkpoint, so an interrupted run
+continues with the next batch when started again with the same config. A cell stops early once it has
+`early_stop.violations` reads with violations, or once the confidence interval of its violation rate lies completely
+below or above `early_stop.max_violation_rate` (if set, this also stops clean cells before reps_per_file). Without
+reference data the first read of a batch is compared to the last read of the previous batch of its cell.
+
+With `dataset = true` a cell reads the whole folder of a layout as one dataset (file index -1) instead of a single
+file, e.g. with the polars_scan engine; engines that only read single files record read errors.
+
+A batch interrupted after its results were stored, but before the checkpoint was written, is run again and its
+repetitions appear twice in the store (same run id, cell and rep).
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+import tomllib
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any
+
+import polars as pl
+from tqdm import tqdm
+
+from instrumentation import SlowRepProfiler
+from parquet_manifest import read_catalog, verify_parquet_file
+from results_store import append_results, new_run_id
+from test_read_parquet_file import col_to_check, find_precision_violations, list_set_up
+
+DEFAULT_CONFIG = Path("experiment_config.toml")
+
+
+def load_config(path_config: Path) -> dict[str, Any]:
+    with open(path_config, "rb") as f:
+        return tomllib.load(f)
+
+
+def wilson_interval(num_violations: int, num_reads: int, confidence: float) -> tuple[float, float]:
+    """Two-sided Wilson score interval of the violation rate."""
+    if num_reads == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    rate = num_violations / num_reads
+    center = (rate + z**2 / (2 * num_reads)) / (1 + z**2 / num_reads)
+    half_width = z * math.sqrt(rate * (1 - rate) / num_reads + z**2 / (4 * num_reads**2)) / (1 + z**2 / num_reads)
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def stop_reason(cell: dict[str, Any], config: dict[str, Any]) -> str | None:
+    """Why the cell needs no more repetitions, None if it does."""
+    if cell["num_reps"] >= config["reps_per_file"]:
+        return "reps_per_file reached"
+    early_stop = config.get("early_stop", {})
+    if "violations" in early_stop and cell["num_reads_with_violations"] >= early_stop["violations"]:
+        return "violation target reached"
+    if "max_violation_rate" in early_stop:
+        lower, upper = wilson_interval(
+            cell["num_reads_with_violations"], cell["num_reps"], early_stop.get("confidence", 0.99)
+        )
+        if upper < early_stop["max_violation_rate"]:
+            return "violation rate below max_violation_rate"
+        if lower > early_stop["max_violation_rate"]:
+            return "violation rate above max_violation_rate"
+    return None
+
+
+def read_checkpoint(path_checkpoint: Path) -> dict[str, Any]:
+    if not path_checkpoint.exists():
+        return {"run_id": new_run_id(), "cells": {}}
+    return json.loads(path_checkpoint.read_text())
+
+
+def write_checkpoint(path_checkpoint: Path, checkpoint: dict[str, Any]) -> None:
+    # write to a temporary file first, so an interrupted run never leaves a truncated checkpoint behind
+    path_checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    path_tmp = path_checkpoint.with_suffix(".json.tmp")
+    path_tmp.write_text(json.dumps(checkpoint, indent=2, sort_keys=True))
+    os.replace(path_tmp, path_checkpoint)
+
+
+def cell_key(name_layout: str, name_test: str, num_workers: int, file_idx: int) -> str:
+    return f"{name_layout}/{name_test}/workers={num_workers}/file={file_idx}"
+
+
+def run_experiment(config: dict[str, Any]) -> dict[str, Any]:
+    """Run (or continue) the experiment of `config` and return its checkpoint."""
+    results_dir = Path(config.get("results_dir", "results_check_parquet_file"))
+    # a changed config is a new experiment with its own checkpoint and run id
+    hash_config = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+    path_checkpoint = results_dir / f"checkpoint_{config.get('name', 'experiment')}_{hash_config}.json"
+    checkpoint = read_checkpoint(path_checkpoint)
+    run_id = checkpoint["run_id"]
+    print(f"run id {run_id}, checkpoint {path_checkpoint}")
+
+    catalog = read_catalog(Path(config.get("dir_parquet_files", "synthetic_parquet_files"))).sort("file_idx")
+    if "layouts" in config:
+        catalog = catalog.filter(pl.col("layout").is_in(config["layouts"]))
+    set_ups = [s for s in list_set_up if s["name_test"] in config.get("engines", [s["name_test"] for s in list_set_up])]
+
+    # Verify the generated files against the checksums in their manifest before the long run starts
+    for path_file in tqdm(catalog["path"], desc="Verifying checksums"):
+        verify_parquet_file(Path(path_file))
+
+    reference_dir = Path(config["reference_dir"]) if "reference_dir" in config else None
+    forensics_dir = Path(config["forensics_dir"]) if "forensics_dir" in config else None
+    embedded_digests = config.get("embedded_digests", False)
+    if config.get("dataset", False):
+        if reference_dir is not None or forensics_dir is not None or config.get("in_memory", False) or embedded_digests:
+            raise ValueError(
+                "The dataset mode reads folders, reference_dir, forensics_dir, in_memory and embedded_digests need "
+                "files"
+            )
+        dir_parquet_files = Path(config.get("dir_parquet_files", "synthetic_parquet_files"))
+        sources = [(name_layout, -1, dir_parquet_files / name_layout) for name_layout in catalog["layout"].unique()]
+    else:
+        sources = catalog.select("layout", "file_idx", "path").rows()
+    profiler = None
+    if "slow_rep_threshold_s" in config:
+        profiler = SlowRepProfiler(config["slow_rep_threshold_s"], results_dir / "profiles" / run_id)
+
+    cells = {}
+    for name_layout, file_idx, path_file in sorted(sources):
+        for set_up in set_ups:
+            for num_workers in config.get("num_workers", [1]):
+                key = cell_key(name_layout, set_up["name_test"], num_workers, file_idx)
+                cells[key] = (name_layout, set_up, num_workers, file_idx, Path(path_file))
+    for key in cells:
+        checkpoint["cells"].setdefault(key, {"num_reps": 0, "num_reads_with_violations": 0, "num_errors": 0})
+    # digests of the last read of every cell, the baseline of the next batch when comparing to the previous read
+    last_digests: dict[str, dict[int, Any]] = {key: {} for key in cells}
+
+    while True:
+        open_cells = [key for key in cells if checkpoint["cells"][key].get("stop_reason") is None]
+        if not open_cells:
+            break
+        for key in open_cells:
+            name_layout, set_up, num_workers, file_idx, path_file = cells[key]
+            cell = checkpoint["cells"][key]
+            num_reps = min(config["reps_per_batch"], config["reps_per_file"] - cell["num_reps"])
+            print(f"{key}: reps {cell['num_reps']} to {cell['num_reps'] + num_reps - 1}")
+
+            violations, errors_reading_files, reads, events = find_precision_violations(
+                paths_parquet_files=[path_file],
+                name_test=set_up["name_test"],
+                rtol=config.get("rtol", 1e-7),
+                atol=config.get("atol", 1e-10),
+                hash_fun=set_up["hash_fun"],
+                read_parquet_file=set_up["read_parquet_file"],
+                num_reps_per_file=num_reps,
+                col_to_check=col_to_check,
+                output_dir=None,
+                reference_dir=reference_dir,
+                num_workers=num_workers,
+                executor=config.get("executor", "thread"),
+                forensics_dir=forensics_dir,
+                profiler=profiler,
+                file_indices=[file_idx],
+                first_rep=cell["num_reps"],
+                prefetch=config.get("prefetch", 0),
+                in_memory=config.get("in_memory", False),
+                embedded_digests=embedded_digests,
+                last_digests=last_digests[key],
+            )
+
+            # the writer_lib partition holds the layout, "polars" and "pandas" are the default ones
+            append_results(violations, "violations", run_id, name_layout, set_up["name_test"])
+            append_results(errors_reading_files, "errors", run_id, name_layout, set_up["name_test"])
+            append_results(reads, "reads", run_id, name_layout, set_up["name_test"])
+            append_results(events, "events", run_id, name_layout, set_up["name_test"])
+
+            cell["num_reps"] += num_reps
+            cell["num_reads_with_violations"] += len({violation["rep"] for violation in violations})
+            cell["num_errors"] += len(errors_reading_files)
+            cell["stop_reason"] = stop_reason(cell, config)
+            write_checkpoint(path_checkpoint, checkpoint)
+            if cell["stop_reason"] is not None:
+                print(f"{key}: done after {cell['num_reps']} reps, {cell['stop_reason']}")
+
+    return checkpoint
+
+
+if __name__ == "__main__":
+    run_experiment(load_config(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONFIG))
@@ -0,0 +1,100 @@
+"""
+Instrumentation of the repetitions of the read checks.
+
+Every phase of a repetition (read, sort, hash, compare) is recorded as an event with wall and CPU time, bytes read
+and RSS growth, together with the engine/file/rep identifiers passed in. Repetitions that run longer than a
+threshold can additionally be sampled by `SlowRepProfiler`.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from read_engines import current_rss
+
+
+def read_num_bytes() -> int:
+    """Bytes this process read through read() calls so far (Linux), reads of memory-mapped files do not count."""
+    with open("/proc/self/io") as f:
+        for line in f:
+            if line.startswith("rchar:"):
+                return int(line.split()[1])
+    return 0
+
+
+@contextmanager
+def phase(events: list[dict[str, Any]], name: str, **fields: Any) -> Iterator[dict[str, Any]]:
+    """
+    Append an event for the phase `name` to `events`, the yielded event can be extended inside the block. CPU time,
+    bytes read and RSS are those of the whole process, they include the thread pools of the engines and, with
+    concurrent repetitions, the other repetitions in progress.
+    """
+    event = {"phase": name, **fields}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    read_start = read_num_bytes()
+    rss_start = current_rss()
+    try:
+        yield event
+    finally:
+        event.update(
+            {
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "read_num_bytes": read_num_bytes() - read_start,
+                "rss_delta_num_bytes": current_rss() - rss_start,
+            }
+        )
+        events.append(event)
+
+
+@dataclass(frozen=True)
+class SlowRepProfiler:
+    """
+    Sampling profiler for slow repetitions: once a repetition runs longer than `threshold_s`, the Python stack of
+    its thread is sampled every `interval_s` until it ends. The samples are written to `output_dir/<name>.folded` in
+    the folded stack format (`frame;frame;... count`, e.g. for flamegraph.pl or speedscope). Time spent in native
+    code (decoding, sorting) is attributed to the Python frame that called it.
+    """
+
+    threshold_s: float
+    output_dir: Path
+    interval_s: float = 0.005
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[dict[str, Any]]:
+        """Profile the block if it is slow, the yielded dict holds the path of the profile afterwards (or None)."""
+        thread_id = threading.get_ident()
+        stop = threading.Event()
+        samples: Counter[str] = Counter()
+
+        def sample() -> None:
+            if stop.wait(self.threshold_s):
+                return
+            while not stop.wait(self.interval_s):
+                frame = sys._current_frames().get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                samples[";".join(reversed(stack))] += 1
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        result: dict[str, Any] = {"profile": None}
+        sampler.start()
+        try:
+            yield result
+        finally:
+            stop.set()
+            sampler.join()
+            if samples:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                path_profile = self.output_dir / f"{name}.folded"
+                path_profile.write_text("".join(f"{stack} {count}\n" for stack, count in samples.items()))
+                result["profile"] = str(path_profile)
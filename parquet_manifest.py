@@ -0,0 +1,165 @@
+"""
+Manifest of the generated parquet files (`synthetic_parquet_files/manifest.json`).
+
+It records, for every file, the hash of the config the file was generated with (generation parameters plus the
+versions of the writing libraries), the file's size and its sha256 checksum. The generator uses it to rebuild only
+the files whose config changed, the reader scripts use it to verify a file before a long run.
+
+The catalog (`synthetic_parquet_files/catalog.parquet`) lists the same files with their layout (writer and writer
+options) and what the parquet footer says about them, so readers and the benchmark can iterate over all layouts.
+"""
+
+import hashlib
+import json
+import os
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import pyarrow.parquet as pq
+
+MANIFEST_FILE_NAME = "manifest.json"
+CATALOG_FILE_NAME = "catalog.parquet"
+
+
+def library_versions() -> dict[str, str]:
+    return {name: version(name) for name in ["numpy", "pandas", "polars", "pyarrow"]}
+
+
+def config_hash(config: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def read_manifest(output_dir: Path) -> dict[str, Any]:
+    path_manifest = output_dir / MANIFEST_FILE_NAME
+    if not path_manifest.exists():
+        return {"configs": {}, "files": {}}
+    return json.loads(path_manifest.read_text())
+
+
+def write_manifest(output_dir: Path, manifest: dict[str, Any]) -> None:
+    # write to a temporary file first, so an interrupted run never leaves a truncated manifest behind
+    # drop configs no file refers to anymore
+    hashes_in_use = {entry["config_hash"] for entry in manifest["files"].values()}
+    manifest["configs"] = {h: config for h, config in manifest["configs"].items() if h in hashes_in_use}
+
+    path_manifest = output_dir / MANIFEST_FILE_NAME
+    path_tmp = path_manifest.with_suffix(".json.tmp")
+    path_tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(path_tmp, path_manifest)
+
+
+def record_file(manifest: dict[str, Any], output_dir: Path, path: Path, config: dict[str, Any]) -> None:
+    """Add or replace the entry of `path` (with a freshly computed checksum) in the manifest."""
+    hash_config = config_hash(config)
+    manifest["configs"][hash_config] = config
+    manifest["files"][path.relative_to(output_dir).as_posix()] = {
+        "config_hash": hash_config,
+        "num_bytes": path.stat().st_size,
+        "sha256": file_sha256(path),
+    }
+
+
+def generation_is_cached(manifest: dict[str, Any], output_dir: Path, paths: list[Path], config: dict[str, Any]) -> bool:
+    """Whether all `paths` exist and were generated with `config`. The checksums are not recomputed here."""
+    hash_config = config_hash(config)
+    for path in paths:
+        entry = manifest["files"].get(path.relative_to(output_dir).as_posix())
+        if entry is None or entry["config_hash"] != hash_config:
+            return False
+        if not path.exists() or path.stat().st_size != entry["num_bytes"]:
+            return False
+    return True
+
+
+def manifest_entry(path: Path, output_dir: Path | None = None) -> dict[str, Any] | None:
+    """
+    Manifest entry (checksum, size, config hash) of `path`, None if it is not recorded. `output_dir` defaults to the
+    parent of the writer library folder (`synthetic_parquet_files/<lib>/<file>`).
+    """
+    output_dir = path.parent.parent if output_dir is None else output_dir
+    return read_manifest(output_dir)["files"].get(path.relative_to(output_dir).as_posix())
+
+
+def verify_parquet_file(path: Path, output_dir: Path | None = None) -> None:
+    """Check `path` against the checksum recorded in the manifest, raises a ValueError if it is unknown or differs."""
+    output_dir = path.parent.parent if output_dir is None else output_dir
+    entry = manifest_entry(path, output_dir)
+    if entry is None:
+        raise ValueError(f"{path} is not recorded in {output_dir / MANIFEST_FILE_NAME}")
+    if path.stat().st_size != entry["num_bytes"] or file_sha256(path) != entry["sha256"]:
+        raise ValueError(f"{path} does not match the checksum recorded in {output_dir / MANIFEST_FILE_NAME}")
+
+
+def parquet_layout(path: Path, col: str = "value") -> dict[str, Any]:
+    """Footer metadata of `path`, the column chunk details are those of `col` in the first row group."""
+    metadata = pq.read_metadata(path)
+    layout = {
+        "created_by": metadata.created_by,
+        "format_version": metadata.format_version,
+        "num_row_groups": metadata.num_row_groups,
+        "num_rows": metadata.num_rows,
+        "footer_num_bytes": metadata.serialized_size,
+    }
+    row_group = metadata.row_group(0)
+    # the leaf of a list column is e.g. `value.list.element`
+    columns = [row_group.column(j) for j in range(row_group.num_columns)]
+    column = next(c for c in columns if c.path_in_schema.split(".")[0] == col)
+    return {
+        **layout,
+        "compression": column.compression,
+        "encodings": ",".join(column.encodings),
+        "has_dictionary_page": column.has_dictionary_page,
+        "has_statistics": column.is_stats_set,
+        "total_compressed_size": column.total_compressed_size,
+        "total_uncompressed_size": column.total_uncompressed_size,
+    }
+
+
+def write_catalog(output_dir: Path) -> pl.DataFrame:
+    """Write the catalog of all existing files recorded in the manifest and return it."""
+    manifest = read_manifest(output_dir)
+    records = []
+    for key, entry in sorted(manifest["files"].items()):
+        path = output_dir / key
+        if not path.exists():
+            continue
+        config = manifest["configs"][entry["config_hash"]]
+        # the pandas and polars folders hold the default layout of their library
+        writer_options = config.get(
+            "layout",
+            {
+                "writer": path.parent.name,
+                "row_group_size": config["row_group_size"],
+                "data_page_size": config["data_page_size"],
+            },
+        )
+        records.append(
+            {
+                "layout": path.parent.name,
+                "path": str(path),
+                "file_idx": config["file_idx"],
+                "writer": writer_options["writer"],
+                "writer_options": json.dumps(writer_options, sort_keys=True),
+                "num_bytes": entry["num_bytes"],
+                "sha256": entry["sha256"],
+                **parquet_layout(path),
+            }
+        )
+
+    catalog = pl.DataFrame(records)
+    path_catalog = output_dir / CATALOG_FILE_NAME
+    path_tmp = path_catalog.with_suffix(".parquet.tmp")
+    catalog.write_parquet(path_tmp)
+    os.replace(path_tmp, path_catalog)
+    return catalog
+
+
+def read_catalog(output_dir: Path) -> pl.DataFrame:
+    return pl.read_parquet(output_dir / CATALOG_FILE_NAME)
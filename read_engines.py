@@ -0,0 +1,199 @@
+"""
+Memory-mapped and zero-copy read engines, and the memory a read uses.
+
+`ArrowRead` engines decode a file with pyarrow from a memory map (the file is not copied into process memory by
+read() calls) and convert the arrow table to polars or pandas, without copying the float buffers where the library
+allows it. `measure_read` runs any read engine and reports the growth of the arrow memory pool and of the resident
+set size, plus, for `ArrowRead` engines, how many bytes of list values the conversion copied.
+
+`load_file_bytes` loads a file once into memory, reads of the returned `FileBytes` decode from memory without
+touching the filesystem, which takes disk and page cache out of the measurement.
+"""
+
+import dataclasses
+import hashlib
+import io
+import mmap
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from buffer_hashing import is_list_column, list_column_rows
+from parquet_manifest import manifest_entry
+
+
+def to_polars(table: pa.Table) -> pl.DataFrame:
+    # no rechunk, the columns keep pointing to the arrow buffers
+    return pl.from_arrow(table, rechunk=False)  # type: ignore
+
+
+def to_pandas_split_blocks(table: pa.Table) -> pd.DataFrame:
+    # one block per column instead of consolidated 2-D blocks, arrow columns are released while converting
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def to_pandas_arrow_dtype(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+@dataclass(frozen=True)
+class ArrowRead:
+    """Decode with pyarrow (from a memory map if `memory_map`) and convert the table with `convert`."""
+
+    convert: Callable[[pa.Table], Any]
+    columns: list[str] | None = None
+    memory_map: bool = True
+
+    def read_table(self, path_file: Path | pa.NativeFile) -> pa.Table:
+        return pq.read_table(path_file, columns=self.columns, memory_map=self.memory_map)
+
+    def read_counting_copies(self, path_file: Path | pa.NativeFile) -> tuple[Any, int]:
+        """The DataFrame and the number of bytes of list values that are not shared with the decoded table."""
+        table = self.read_table(path_file)
+        # the ranges are taken before converting, the conversion may release the table
+        ranges = list_value_ranges(table)
+        df = self.convert(table)
+        return df, copied_num_bytes(df, ranges)
+
+    def __call__(self, path_file: Path | pa.NativeFile) -> Any:
+        return self.convert(self.read_table(path_file))
+
+
+@dataclass(frozen=True)
+class PolarsMmapRead:
+    """Decode with polars from a memory-mapped buffer of the file."""
+
+    columns: list[str] | None = None
+
+    def __call__(self, path_file: Path | io.BytesIO) -> pl.DataFrame:
+        if not isinstance(path_file, Path):
+            # already in memory
+            return pl.read_parquet(path_file, columns=self.columns)
+        with open(path_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return pl.read_parquet(buffer, columns=self.columns)  # type: ignore
+
+
+@dataclass(frozen=True)
+class PolarsScan:
+    """
+    Decode with a lazy polars scan on the streaming engine. `path_file` can also be a folder of parquet files,
+    which is then scanned as one dataset and decoded file after file by polars itself.
+    """
+
+    columns: list[str] | None = None
+
+    def __call__(self, path_file: Path | io.BytesIO) -> pl.DataFrame:
+        source = path_file / "*.parquet" if isinstance(path_file, Path) and path_file.is_dir() else path_file
+        lf = pl.scan_parquet(source)
+        if self.columns is not None:
+            lf = lf.select(self.columns)
+        return lf.collect(engine="streaming")
+
+
+def with_read_columns(read_parquet_file: Callable[[Any], Any], columns: list[str]) -> Callable[[Any], Any]:
+    """
+    The same read engine (a partial or one of the engines above) reading `columns` instead. Other callables choose
+    their columns themselves and are returned unchanged.
+    """
+    if isinstance(read_parquet_file, partial):
+        return partial(
+            read_parquet_file.func, *read_parquet_file.args, **{**read_parquet_file.keywords, "columns": columns}
+        )
+    if dataclasses.is_dataclass(read_parquet_file):
+        return dataclasses.replace(read_parquet_file, columns=columns)  # type: ignore
+    return read_parquet_file
+
+
+@dataclass(frozen=True)
+class FileBytes:
+    """The bytes of a parquet file, loaded once and shared by all reads of the file."""
+
+    path_file: Path
+    data: bytes
+    sha256: str
+
+
+def load_file_bytes(path_file: Path) -> FileBytes:
+    """
+    Load `path_file` into memory. If the file is recorded in the manifest, the checksum of the loaded bytes has to
+    match the recorded one, so reads from memory decode exactly the bytes the file was written with.
+    """
+    data = path_file.read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    entry = manifest_entry(path_file)
+    if entry is not None and entry["sha256"] != sha256:
+        raise ValueError(f"The bytes loaded from {path_file} do not match the checksum recorded in the manifest")
+    return FileBytes(path_file, data, sha256)
+
+
+def read_source(read_parquet_file: Callable[[Any], Any], path_file: Path | FileBytes) -> Any:
+    """What `read_parquet_file` decodes: the path, or for cached bytes a reader over them (the bytes are not copied)."""
+    if isinstance(path_file, Path):
+        return path_file
+    if isinstance(read_parquet_file, ArrowRead):
+        return pa.BufferReader(path_file.data)
+    # a BytesIO shares the bytes it is created from until it is written to
+    return io.BytesIO(path_file.data)
+
+
+def list_value_ranges(table: pa.Table) -> list[tuple[int, int]]:
+    """Address ranges of the value buffers of all list columns of `table`."""
+    ranges = []
+    for column in table.columns:
+        is_list_type = [pa.types.is_list, pa.types.is_large_list, pa.types.is_fixed_size_list]
+        if not any(is_type(column.type) for is_type in is_list_type):
+            continue
+        for chunk in column.chunks:
+            buffer = chunk.values.buffers()[1]
+            if buffer is not None:
+                ranges.append((buffer.address, buffer.address + buffer.size))
+    return ranges
+
+
+def copied_num_bytes(df: pl.DataFrame | pd.DataFrame, ranges: list[tuple[int, int]]) -> int:
+    """Bytes of list values of `df` that do not lie in any of the address `ranges`."""
+    num_bytes = 0
+    for col in df.columns:
+        if not is_list_column(df[col]):
+            continue
+        for row in list_column_rows(df[col]):
+            if not any(start <= row.ctypes.data < stop for start, stop in ranges):
+                num_bytes += row.nbytes
+    return num_bytes
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure_read(
+    read_parquet_file: Callable[[Any], Any], path_file: Path | FileBytes
+) -> tuple[Any, dict[str, int | None]]:
+    """
+    Run one read (of the file or of its cached bytes) and report its memory use. With concurrent reads in threads
+    the RSS and arrow pool deltas include the other reads in progress. `copied_num_bytes` is None for engines that
+    do not decode to arrow first.
+    """
+    source = read_source(read_parquet_file, path_file)
+    rss_start = current_rss()
+    allocated_start = pa.total_allocated_bytes()
+    if isinstance(read_parquet_file, ArrowRead):
+        df, num_bytes_copied = read_parquet_file.read_counting_copies(source)
+    else:
+        df, num_bytes_copied = read_parquet_file(source), None
+    stats = {
+        "copied_num_bytes": num_bytes_copied,
+        "arrow_allocated_num_bytes": pa.total_allocated_bytes() - allocated_start,
+        "rss_delta_num_bytes": current_rss() - rss_start,
+    }
+    return df, stats
@@ -0,0 +1,94 @@
+"""
+Reference ("golden") data for the read checks.
+
+A file is decoded once with a trusted engine and the flattened list column is stored as `.npy` files (values, row
+offsets and row digests). Reads are then compared against the memory-mapped reference, so only one decoded DataFrame
+has to be kept in memory and violations are reported relative to the true values.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from buffer_hashing import column_rows, row_digests
+from parquet_manifest import file_sha256
+
+
+def read_reference_pandas_pyarrow(path_file: Path, col_to_check: str) -> pd.DataFrame:
+    columns = list(dict.fromkeys(["date", col_to_check]))
+    return pd.read_parquet(path_file, columns=columns, engine="pyarrow").sort_values(by=["date"])
+
+
+@dataclass
+class Reference:
+    offsets: np.ndarray
+    values: np.ndarray
+    digests: np.ndarray
+
+    def row(self, row_index: int) -> np.ndarray:
+        return self.values[self.offsets[row_index] : self.offsets[row_index + 1]]
+
+    def rows(self) -> list[np.ndarray]:
+        return [self.row(row_index) for row_index in range(len(self.offsets) - 1)]
+
+    @classmethod
+    def from_paths(cls, paths: dict[str, Path]) -> "Reference":
+        return cls(**{name: np.load(path, mmap_mode="r") for name, path in paths.items()})
+
+
+def reference_paths(path_file: Path, col_to_check: str, reference_dir: Path) -> dict[str, Path]:
+    # the checksum of the source file is part of the name, so a regenerated file never meets a stale reference
+    prefix = f"{path_file.parent.name}_{path_file.stem}_{file_sha256(path_file)[:16]}_{col_to_check}"
+    return {name: reference_dir / f"{prefix}_{name}.npy" for name in ["offsets", "values", "digests"]}
+
+
+def create_reference(
+    path_file: Path,
+    col_to_check: str,
+    reference_dir: Path,
+    read_reference: Callable[[Path, str], Any] = read_reference_pandas_pyarrow,
+) -> None:
+    """Decode `path_file` with the trusted `read_reference` (sorted by date) and store the flattened column."""
+    df = read_reference(path_file, col_to_check)
+    rows = column_rows(df[col_to_check])
+    offsets = np.concatenate([[0], np.cumsum([len(row) for row in rows])]).astype(np.int64)
+
+    paths = reference_paths(path_file, col_to_check, reference_dir)
+    reference_dir.mkdir(parents=True, exist_ok=True)
+    # write the values row by row into the memory-mapped file instead of concatenating them in memory
+    # stored with the float type of the file (float64 or float32), so equal reads compare bitwise equal
+    dtype = rows[0].dtype if rows else np.float64
+    values = np.lib.format.open_memmap(paths["values"], mode="w+", dtype=dtype, shape=(int(offsets[-1]),))
+    for row_index, row in enumerate(rows):
+        values[offsets[row_index] : offsets[row_index + 1]] = row
+    values.flush()
+    del values
+    np.save(paths["offsets"], offsets)
+    np.save(paths["digests"], row_digests(df, col_to_check))
+
+
+def ensure_reference(
+    path_file: Path,
+    col_to_check: str,
+    reference_dir: Path,
+    read_reference: Callable[[Path, str], Any] = read_reference_pandas_pyarrow,
+) -> dict[str, Path]:
+    """Paths of the reference of `path_file`, which is created first if it does not exist yet."""
+    paths = reference_paths(path_file, col_to_check, reference_dir)
+    if not all(path.exists() for path in paths.values()):
+        create_reference(path_file, col_to_check, reference_dir, read_reference)
+    return paths
+
+
+def load_reference(
+    path_file: Path,
+    col_to_check: str,
+    reference_dir: Path,
+    read_reference: Callable[[Path, str], Any] = read_reference_pandas_pyarrow,
+) -> Reference:
+    """Memory-map the reference of `path_file`, creating it first if it does not exist yet."""
+    return Reference.from_paths(ensure_reference(path_file, col_to_check, reference_dir, read_reference))
@@ -0,0 +1,43 @@
+"""Run the repetitions of a read check concurrently while collecting their results in order."""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Literal
+
+ExecutorKind = Literal["thread", "process"]
+
+
+def make_executor(executor: ExecutorKind, num_workers: int, initializer: Callable[[], None] | None = None) -> Executor:
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=num_workers, initializer=initializer)
+    if executor == "process":
+        # polars and pyarrow run thread pools of their own, which do not survive a fork
+        return ProcessPoolExecutor(max_workers=num_workers, mp_context=get_context("spawn"), initializer=initializer)
+    raise ValueError(f"Unknown executor {executor}")
+
+
+def map_ordered(
+    fun: Callable[..., Any],
+    args: Iterable[tuple[Any, ...]],
+    pool: Executor | None,
+    max_in_flight: int,
+) -> Iterator[Any]:
+    """
+    Yield fun(*a) for every a in args in order. With a pool, calls run concurrently but at most `max_in_flight`
+    results (e.g. decoded DataFrames) are pending or waiting to be consumed at any time. Without a pool, calls run
+    one after another in the calling thread.
+    """
+    if pool is None:
+        for a in args:
+            yield fun(*a)
+        return
+
+    in_flight: deque[Future] = deque()
+    for a in args:
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+        in_flight.append(pool.submit(fun, *a))
+    while in_flight:
+        yield in_flight.popleft().result()
@@ -0,0 +1,142 @@
+"""
+Append-only store of the read check results.
+
+Violations, read errors, read counts and per-phase events are written as a hive partitioned parquet dataset
+`<store_dir>/<table>/run_id=<run>/writer_lib=<lib>/engine=<engine>/<uuid>.parquet` with native list columns.
+Every call adds new files (written to a temporary name and renamed), existing files are never rewritten, so
+concurrent or interrupted runs cannot corrupt earlier results.
+"""
+
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+RESULTS_STORE_DIR = Path("./results_store")
+
+SCHEMAS = {
+    "violations": pl.Schema(
+        {
+            "name_test": pl.String,
+            "length_1": pl.Int64,
+            "length_2": pl.Int64,
+            "data_1": pl.List(pl.Float64),
+            "data_2": pl.List(pl.Float64),
+            "indices_violation": pl.List(pl.Int64),
+            "row_index": pl.Int64,
+            "rep": pl.Int64,
+            "file_index": pl.Int64,
+            "num_workers": pl.Int64,
+            "in_memory": pl.Boolean,
+            # set by the forensics mode, see violation_forensics.py
+            "file_row": pl.Int64,
+            "row_group": pl.Int64,
+            "data_pages": pl.List(pl.Int64),
+            "classification": pl.String,
+            "max_flipped_bits": pl.Int64,
+            "localization_ms": pl.Float64,
+        }
+    ),
+    "errors": pl.Schema(
+        {
+            "name_test": pl.String,
+            "file_index": pl.Int64,
+            "rep": pl.Int64,
+            "num_workers": pl.Int64,
+            "in_memory": pl.Boolean,
+            "error": pl.String,
+        }
+    ),
+    # number of reads per file, the denominator of violation rates, and the largest memory use of a read
+    "reads": pl.Schema(
+        {
+            "name_test": pl.String,
+            "file_index": pl.Int64,
+            "num_reads": pl.Int64,
+            "num_workers": pl.Int64,
+            "in_memory": pl.Boolean,
+            "copied_num_bytes_max": pl.Int64,
+            "arrow_allocated_num_bytes_max": pl.Int64,
+            "rss_delta_num_bytes_max": pl.Int64,
+        }
+    ),
+    # one event per phase of every repetition, see instrumentation.py
+    "events": pl.Schema(
+        {
+            "name_test": pl.String,
+            "file_index": pl.Int64,
+            "rep": pl.Int64,
+            "num_workers": pl.Int64,
+            "in_memory": pl.Boolean,
+            "phase": pl.String,
+            "wall_s": pl.Float64,
+            "cpu_s": pl.Float64,
+            "read_num_bytes": pl.Int64,
+            "rss_delta_num_bytes": pl.Int64,
+            "copied_num_bytes": pl.Int64,
+            "arrow_allocated_num_bytes": pl.Int64,
+            "num_violations": pl.Int64,
+            "profile": pl.String,
+            # combined digest of the data of the read (hash phase), see buffer_hashing.py
+            "digest": pl.String,
+        }
+    ),
+}
+PARTITION_SCHEMA = pl.Schema({"run_id": pl.String, "writer_lib": pl.String, "engine": pl.String})
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}"
+
+
+def append_results(
+    records: list[dict[str, Any]],
+    table: str,
+    run_id: str,
+    writer_lib: str,
+    engine: str,
+    store_dir: Path = RESULTS_STORE_DIR,
+) -> Path | None:
+    """Write `records` as a new file of the partition (run_id, writer_lib, engine) of `table`."""
+    if not records:
+        return None
+
+    schema = SCHEMAS[table]
+    df = pl.DataFrame([{name: record.get(name) for name in schema} for record in records], schema=schema)
+
+    dir_partition = store_dir / table / f"run_id={run_id}" / f"writer_lib={writer_lib}" / f"engine={engine}"
+    dir_partition.mkdir(parents=True, exist_ok=True)
+    path = dir_partition / f"{uuid.uuid4().hex}.parquet"
+    path_tmp = path.with_suffix(".parquet.tmp")
+    df.write_parquet(path_tmp)
+    os.replace(path_tmp, path)
+    return path
+
+
+def scan_results(table: str, store_dir: Path = RESULTS_STORE_DIR) -> pl.LazyFrame:
+    """Lazy scan of all runs of `table`; filters on run_id/writer_lib/engine prune whole partitions."""
+    schema = pl.Schema({**SCHEMAS[table], **PARTITION_SCHEMA})
+    if not any((store_dir / table).glob("**/*.parquet")):
+        return pl.LazyFrame(schema=schema)
+    # columns added to a table later are null in files of earlier runs
+    return pl.scan_parquet(
+        store_dir / table / "**" / "*.parquet",
+        hive_partitioning=True,
+        hive_schema=PARTITION_SCHEMA,
+        schema=schema,
+        missing_columns="insert",
+    )
+
+
+def violation_counts(violations_lf: pl.LazyFrame, keys: list[str]) -> pl.LazyFrame:
+    """
+    Reads with violations and number of violating elements per group of `keys`, counted on the stored violations.
+    A violation without elements (embedded_digests mode) still counts as a read with violations.
+    """
+    return violations_lf.group_by(keys).agg(
+        pl.struct("run_id", "num_workers", "rep").n_unique().alias("num_reads_with_violations"),
+        pl.col("indices_violation").list.len().sum().alias("total_violations"),
+    )
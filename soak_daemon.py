@@ -0,0 +1,290 @@
+"""
+Soak test: reader threads or processes read the same files over and over, for hours, and check every read against
+reference data (see reference_data.py) of each column of `COLS_TO_CHECK`.
+
+Memory stays bounded: the references are memory-mapped, at most two reads per worker are in flight and only counters
+are kept of the reads. Reads/s and the violation rate are printed and appended to `soak_<run id>.jsonl` every
+`REPORT_INTERVAL_S`. The first divergence of every file is written as a repro bundle (see write_repro_bundle) and the
+soak keeps running. SIGINT and SIGTERM stop it once the reads in flight are done.
+"""
+
+import itertools
+import json
+import os
+import platform
+import signal
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+from buffer_hashing import column_rows, row_digests
+from parquet_manifest import file_sha256, library_versions
+from read_engines import current_rss, with_read_columns
+from reference_data import Reference, ensure_reference
+from rep_scheduler import ExecutorKind, make_executor, map_ordered
+from results_store import new_run_id
+from test_read_parquet_file import col_to_check, list_set_up, read_and_hash, violations_in_read
+
+# Configuration
+PATHS_PARQUET_FILES = [Path("synthetic_parquet_files/polars/data_000.parquet")]
+# name_test of an entry of list_set_up in test_read_parquet_file.py
+ENGINE = "polars_rust"
+NUM_WORKERS = 4
+EXECUTOR: ExecutorKind = "thread"
+# Columns compared against their reference, a scalar column like `date` is compared as a whole
+COLS_TO_CHECK = [col_to_check]
+# None: run until interrupted
+DURATION_S: float | None = None
+REPORT_INTERVAL_S = 60.0
+RTOL = 1e-7
+ATOL = 1e-10
+SOAK_DIR = Path("soak_results")
+REFERENCE_DIR = Path("reference_data")
+# Environment variables recorded in the repro bundles (thread pools, allocators)
+ENVIRONMENT_PREFIXES = ("POLARS_", "ARROW_", "OMP_", "RAYON_", "MALLOC_")
+
+
+def set_up_by_name(name_test: str) -> dict[str, Any]:
+    return next(set_up for set_up in list_set_up if set_up["name_test"] == name_test)
+
+
+def ignore_sigint() -> None:
+    # worker processes leave Ctrl-C to the main process, which stops after the reads in flight
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def frame_row_digests(df: pl.DataFrame | Any, cols: list[str]) -> dict[str, np.ndarray]:
+    return {col: row_digests(df, col) for col in cols}
+
+
+def soak_read(
+    set_up: dict[str, Any],
+    path_file: Path,
+    paths_reference: dict[str, dict[str, Path]],
+    rtol: float,
+    atol: float,
+) -> dict[str, Any]:
+    """One read checked against the reference of every column, only a divergent read sends its rows back."""
+    hash_fun = partial(frame_row_digests, cols=list(paths_reference))
+    df, digests, error, events = read_and_hash(set_up["read_parquet_file"], hash_fun, path_file)
+    result = {
+        "path_file": path_file,
+        "error": error,
+        "read_s": sum(event["wall_s"] for event in events if event["phase"] == "read"),
+        "violations": [],
+        "rows": {},
+    }
+    if error is not None:
+        return result
+
+    dates = df["date"].to_numpy()  # type: ignore
+    for col, paths_reference_col in paths_reference.items():
+        reference = Reference.from_paths(paths_reference_col)
+        violations = violations_in_read(
+            df,  # type: ignore
+            digests[col],  # type: ignore
+            reference.digests,
+            reference.rows,
+            set_up["name_test"],
+            path_file,
+            col,
+            rtol,
+            atol,
+        )
+        if violations:
+            rows = column_rows(df[col])  # type: ignore
+            for violation in violations:
+                violation["column"] = col
+                row_index = violation["row_index"]
+                # a scalar column is one row, it has no date of its own
+                date = int(dates[row_index]) if len(rows) == len(dates) else None
+                result["rows"][(col, row_index)] = (date, np.array(rows[row_index]))
+        result["violations"] += violations
+    return result
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "hostname": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "variables": {name: value for name, value in os.environ.items() if name.startswith(ENVIRONMENT_PREFIXES)},
+    }
+
+
+def write_repro_bundle(
+    bundle_dir: Path,
+    result: dict[str, Any],
+    paths_reference: dict[str, dict[str, Path]],
+    description: dict[str, Any],
+) -> Path:
+    """
+    Write a divergent read to `bundle_dir`: `rows_<column>.parquet` with the read and the reference values of every
+    divergent row of a column, and `repro.json` with the file (path, checksum), library versions, environment and
+    `description` (engine, concurrency, when it happened).
+    """
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    indices_violation = {
+        (violation["column"], violation["row_index"]): violation["indices_violation"]
+        for violation in result["violations"]
+    }
+    for col, paths_reference_col in paths_reference.items():
+        keys = [key for key in result["rows"] if key[0] == col]
+        if not keys:
+            continue
+        reference = Reference.from_paths(paths_reference_col)
+        pl.DataFrame(
+            {
+                "row_index": [row_index for _, row_index in keys],
+                "date": [result["rows"][key][0] for key in keys],
+                "indices_violation": [indices_violation[key] for key in keys],
+                "read": [result["rows"][key][1] for key in keys],
+                "reference": [np.array(reference.row(row_index)) for _, row_index in keys],
+            }
+        ).write_parquet(bundle_dir / f"rows_{col}.parquet")
+
+    path_file = result["path_file"]
+    repro = {
+        **description,
+        "path_file": str(path_file),
+        "file_sha256": file_sha256(path_file),
+        "cols_to_check": list(paths_reference),
+        "library_versions": library_versions(),
+        "environment": environment(),
+        "violations": result["violations"],
+    }
+    (bundle_dir / "repro.json").write_text(json.dumps(repro, indent=2, default=str))
+    return bundle_dir
+
+
+def soak_report(totals: Counter, interval: Counter, elapsed_s: float, interval_s: float) -> dict[str, Any]:
+    return {
+        "time": f"{datetime.now():%Y-%m-%dT%H:%M:%S}",
+        "elapsed_s": elapsed_s,
+        "num_reads": totals["reads"],
+        "reads_per_s": interval["reads"] / interval_s if interval_s > 0 else 0.0,
+        "violation_rate": totals["reads_with_violations"] / max(totals["reads"], 1),
+        "violation_rate_interval": interval["reads_with_violations"] / max(interval["reads"], 1),
+        "num_reads_with_violations": totals["reads_with_violations"],
+        "num_errors": totals["errors"],
+        "mean_read_s_interval": interval["read_s"] / max(interval["reads"], 1),
+        "rss_num_bytes": current_rss(),
+    }
+
+
+def print_report(report: dict[str, Any], path_log: Path) -> None:
+    print(
+        f"{report['time']} {report['elapsed_s']:.0f} s: {report['num_reads']} reads ({report['reads_per_s']:.2f}/s), "
+        f"violation rate {report['violation_rate']:.2e} ({report['violation_rate_interval']:.2e} in the interval), "
+        f"{report['num_errors']} errors, mean read {report['mean_read_s_interval'] * 1000:.1f} ms, "
+        f"RSS {report['rss_num_bytes'] / 1024**2:.0f} MB"
+    )
+    with open(path_log, "a") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def soak(
+    paths_parquet_files: list[Path],
+    set_up: dict[str, Any],
+    num_workers: int = NUM_WORKERS,
+    executor: ExecutorKind = EXECUTOR,
+    cols_to_check: list[str] = COLS_TO_CHECK,
+    duration_s: float | None = DURATION_S,
+    report_interval_s: float = REPORT_INTERVAL_S,
+    rtol: float = RTOL,
+    atol: float = ATOL,
+    soak_dir: Path = SOAK_DIR,
+    reference_dir: Path = REFERENCE_DIR,
+) -> dict[str, Any]:
+    """
+    Read the files round-robin with `num_workers` concurrent reads until `duration_s` or a signal. The reads of
+    `set_up` are changed to read `date` and `cols_to_check`.
+    """
+    run_id = new_run_id()
+    name_test = set_up["name_test"]
+    columns = list(dict.fromkeys(["date", *cols_to_check]))
+    set_up = {**set_up, "read_parquet_file": with_read_columns(set_up["read_parquet_file"], columns)}
+    paths_reference = {
+        path_file: {col: ensure_reference(path_file, col, reference_dir) for col in cols_to_check}
+        for path_file in paths_parquet_files
+    }
+    path_log = soak_dir / f"soak_{run_id}.jsonl"
+    soak_dir.mkdir(parents=True, exist_ok=True)
+    print(
+        f"Soak {run_id}: {name_test}, {num_workers} {executor} workers, {len(paths_parquet_files)} files, "
+        f"columns {cols_to_check} (rtol {rtol}, atol {atol})"
+    )
+    print(f"Reports are appended to {path_log}")
+
+    stop = threading.Event()
+    handlers = {signum: signal.signal(signum, lambda *_: stop.set()) for signum in [signal.SIGINT, signal.SIGTERM]}
+    time_start = time.monotonic()
+
+    def tasks() -> Iterator[tuple[Any, ...]]:
+        for path_file in itertools.cycle(paths_parquet_files):
+            if stop.is_set() or (duration_s is not None and time.monotonic() - time_start >= duration_s):
+                return
+            yield set_up, path_file, paths_reference[path_file], rtol, atol
+
+    totals: Counter = Counter()
+    interval: Counter = Counter()
+    bundles: dict[Path, Path] = {}
+    time_report = time_start
+    initializer = ignore_sigint if executor == "process" else None
+    try:
+        with make_executor(executor, num_workers, initializer) as pool:
+            for read_index, result in enumerate(map_ordered(soak_read, tasks(), pool, 2 * num_workers)):
+                for counter in [totals, interval]:
+                    counter["reads"] += 1
+                    counter["reads_with_violations"] += bool(result["violations"])
+                    counter["errors"] += result["error"] is not None
+                    counter["read_s"] += result["read_s"]
+                if result["error"] is not None and totals["errors"] == 1:
+                    print(f"First read error on {result['path_file']}: {result['error']}")
+
+                if result["violations"] and result["path_file"] not in bundles:
+                    path_file = result["path_file"]
+                    bundles[path_file] = write_repro_bundle(
+                        soak_dir / f"repro_{run_id}_{path_file.parent.name}_{path_file.stem}",
+                        result,
+                        paths_reference[path_file],
+                        {
+                            "run_id": run_id,
+                            "engine": name_test,
+                            "num_workers": num_workers,
+                            "executor": executor,
+                            "read_index": read_index,
+                            "elapsed_s": time.monotonic() - time_start,
+                            "rtol": rtol,
+                            "atol": atol,
+                        },
+                    )
+                    print(f"Divergent read {read_index} of {path_file}, repro bundle written to {bundles[path_file]}")
+
+                now = time.monotonic()
+                if now - time_report >= report_interval_s:
+                    report = soak_report(totals, interval, now - time_start, now - time_report)
+                    print_report(report, path_log)
+                    interval.clear()
+                    time_report = now
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+    now = time.monotonic()
+    report = soak_report(totals, interval, now - time_start, now - time_report)
+    print_report(report, path_log)
+    return report
+
+
+if __name__ == "__main__":
+    soak(PATHS_PARQUET_FILES, set_up_by_name(ENGINE))
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pytest
+
+import create_parquet_files
+from buffer_hashing import column_rows, combined_digest, hash_row, list_column_rows, row_digests, verify_row_digests
+
+ROWS = [[1.0, -0.0, np.nan], [], [2.5, 1e-300], [np.inf, 3.0, 4.0]]
+
+
+def frames() -> dict[str, pl.DataFrame | pd.DataFrame]:
+    """The same list column as read by the different engines (polars, pandas with numpy and with arrow dtypes)."""
+    table = pa.table({"date": np.arange(len(ROWS)), "value": pa.array(ROWS, type=pa.list_(pa.float64()))})
+    return {
+        "polars": pl.from_arrow(table),  # type: ignore
+        "polars_large_list": pl.DataFrame({"value": ROWS}, schema={"value": pl.List(pl.Float64)}),
+        "pandas_numpy": table.to_pandas(),
+        "pandas_arrow_dtype": table.to_pandas(types_mapper=pd.ArrowDtype),
+        "pandas_chunked": pa.chunked_array([table["value"][:1], table["value"][1:]]).to_pandas().to_frame("value"),
+    }
+
+
+@pytest.mark.parametrize("name", list(frames()))
+def test_row_digests_equal_across_engines(name: str) -> None:
+    expected = np.array([hash_row(np.array(row, dtype=np.float64)) for row in ROWS], dtype=np.uint64)
+    np.testing.assert_array_equal(row_digests(frames()[name], "value"), expected)
+
+
+def test_list_column_rows_of_sliced_and_chunked_arrays() -> None:
+    array = pa.array(ROWS, type=pa.large_list(pa.float64()))
+    chunked = pa.chunked_array([array[1:3], array[3:]])
+    rows = list_column_rows(chunked)
+    assert [row.tolist() for row in rows] == [ROWS[1], ROWS[2], ROWS[3]]
+
+
+def test_fixed_size_list_rows_are_views_of_the_values() -> None:
+    values = np.arange(12, dtype=np.float32)
+    array = pa.FixedSizeListArray.from_arrays(pa.array(values), 4)[1:]
+    rows = list_column_rows(array)
+    assert [row.tolist() for row in rows] == [[4, 5, 6, 7], [8, 9, 10, 11]]
+    assert rows[0].dtype == np.float32
+
+
+def test_scalar_column_is_one_row() -> None:
+    dates = pl.Series("date", [3, 1, 2])
+    assert [row.tolist() for row in column_rows(dates)] == [[3, 1, 2]]
+    assert len(row_digests(pl.DataFrame({"date": dates}), "date")) == 1
+
+
+def test_digest_depends_on_every_bit_and_on_the_float_type() -> None:
+    row = np.array([1.0, 2.0, 3.0])
+    changed = row.copy()
+    changed.view(np.uint64)[1] ^= np.uint64(1)
+    assert hash_row(row) != hash_row(changed)
+    assert hash_row(row) != hash_row(row.astype(np.float32))
+    # -0.0 and 0.0 compare equal but differ in their bits
+    assert hash_row(np.array([0.0])) != hash_row(np.array([-0.0]))
+
+
+def test_combined_digest_depends_on_every_row_and_the_order() -> None:
+    digests = row_digests(frames()["polars"], "value")
+    assert combined_digest(digests) == combined_digest(row_digests(frames()["pandas_numpy"], "value"))
+    assert combined_digest(digests) != combined_digest(digests[::-1])
+    assert combined_digest(digests) != combined_digest(digests[:-1])
+
+
+@pytest.mark.parametrize("writer_lib", ["pandas", "polars"])
+def test_verify_row_digests_flags_a_corrupted_row(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, writer_lib: str
+) -> None:
+    monkeypatch.setattr(create_parquet_files, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(create_parquet_files, "LIST_LENGTH", 100)
+    path_pandas, path_polars = create_parquet_files.generate_parquet_file(0, cache=False, checksum_columns=True)
+
+    if writer_lib == "pandas":
+        df = pd.read_parquet(path_pandas, engine="pyarrow")
+        assert len(verify_row_digests(df, "value")) == 0
+        row = df.at[3, "value"].copy()
+        row[7] = np.nextafter(row[7], np.inf)
+        df.at[3, "value"] = row
+    else:
+        df = pl.read_parquet(path_polars)
+        assert len(verify_row_digests(df, "value")) == 0
+        rows = df["value"].to_list()
+        rows[3][7] = np.nextafter(rows[3][7], np.inf)
+        df = df.with_columns(pl.Series("value", rows, dtype=df["value"].dtype))
+
+    np.testing.assert_array_equal(verify_row_digests(df, "value"), [3])
+    assert len(verify_row_digests(df, "value2")) == 0
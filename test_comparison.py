@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from comparison import find_mismatches
+
+
+def test_nan_equal_to_nan_but_not_to_a_number() -> None:
+    rows_1 = [np.array([np.nan, 1.0, np.nan])]
+    rows_2 = [np.array([np.nan, 1.0, 2.0])]
+    row_indices, element_indices = find_mismatches(rows_1, rows_2, rtol=1e-7, atol=0.0)
+    assert row_indices.tolist() == [0]
+    assert element_indices.tolist() == [2]
+
+
+def test_isclose_within_tolerance_bitwise_otherwise() -> None:
+    # 1 + 1e-9 differs in its bits but is close, 1 + 1e-3 is not; -0.0 is close to 0.0
+    rows_1 = [np.array([1.0, 1.0, 0.0])]
+    rows_2 = [np.array([1.0 + 1e-9, 1.0 + 1e-3, -0.0])]
+    _, element_indices = find_mismatches(rows_1, rows_2, rtol=1e-7, atol=0.0)
+    assert element_indices.tolist() == [1]
+    # with rtol 0 only bitwise equal values are equal
+    _, element_indices = find_mismatches(rows_1, rows_2, rtol=0.0, atol=0.0)
+    assert element_indices.tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 5, 100])
+def test_mismatches_at_chunk_edges(chunk_size: int) -> None:
+    data_1 = np.arange(10, dtype=np.float64)
+    data_2 = data_1.copy()
+    # first and last element of the row and both sides of the edge between two chunks of 4 elements
+    data_2[[0, 3, 4, 9]] += 1.0
+    row_indices, element_indices = find_mismatches([data_1], [data_2], 1e-7, 1e-10, chunk_size=chunk_size)
+    assert row_indices.tolist() == [0, 0, 0, 0]
+    assert element_indices.tolist() == [0, 3, 4, 9]
+
+
+def test_only_the_given_rows_are_compared() -> None:
+    rows_1 = [np.array([1.0]), np.array([2.0]), np.array([3.0])]
+    rows_2 = [np.array([0.0]), np.array([0.0]), np.array([0.0])]
+    row_indices, element_indices = find_mismatches(rows_1, rows_2, 1e-7, 1e-10, rows=[2, 0])
+    assert row_indices.tolist() == [2, 0]
+    assert element_indices.tolist() == [0, 0]
+
+
+def test_float32_and_integer_rows() -> None:
+    rows_1 = [np.array([1.0, 2.0], dtype=np.float32), np.array([5, 6], dtype=np.int64)]
+    rows_2 = [np.array([1.0, 2.5], dtype=np.float32), np.array([5, 7], dtype=np.int64)]
+    row_indices, element_indices = find_mismatches(rows_1, rows_2, 1e-7, 1e-10)
+    assert row_indices.tolist() == [0, 1]
+    assert element_indices.tolist() == [1, 1]
+
+
+def test_no_mismatches_and_length_check() -> None:
+    row_indices, element_indices = find_mismatches([np.zeros(3)], [np.zeros(3)], 1e-7, 1e-10)
+    assert len(row_indices) == len(element_indices) == 0
+    with pytest.raises(ValueError):
+        find_mismatches([np.zeros(3)], [np.zeros(2)], 1e-7, 1e-10)
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+import create_parquet_files
+from parquet_manifest import read_manifest, verify_parquet_file
+
+
+@pytest.mark.parametrize("row_group_size", [None, 7])
+def test_generate_parquet_file_records_its_files_in_the_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, row_group_size: int | None
+) -> None:
+    monkeypatch.setattr(create_parquet_files, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(create_parquet_files, "LIST_LENGTH", 100)
+
+    paths = create_parquet_files.generate_parquet_file(0, cache=True, row_group_size=row_group_size)
+    assert sorted(read_manifest(tmp_path)["files"]) == ["pandas/data_000.parquet", "polars/data_000.parquet"]
+    for path in paths:
+        verify_parquet_file(path, tmp_path)
+
+    # recorded with its config, the second call finds the files up to date and does not rewrite them
+    mtimes = [path.stat().st_mtime_ns for path in paths]
+    assert create_parquet_files.generate_parquet_file(0, cache=True, row_group_size=row_group_size) == paths
+    assert [path.stat().st_mtime_ns for path in paths] == mtimes
+
+    # another config is regenerated and recorded again
+    create_parquet_files.generate_parquet_file(0, cache=True, row_group_size=row_group_size, checksum_columns=True)
+    assert [path.stat().st_mtime_ns for path in paths] != mtimes
+    for path in paths:
+        verify_parquet_file(path, tmp_path)
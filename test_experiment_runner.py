@@ -0,0 +1,40 @@
+import pytest
+
+from experiment_runner import stop_reason, wilson_interval
+
+
+def test_wilson_interval_known_values() -> None:
+    # 95 %: z = 1.96
+    lower, upper = wilson_interval(0, 100, 0.95)
+    assert lower == 0.0
+    assert upper == pytest.approx(0.03699, abs=1e-5)
+    lower, upper = wilson_interval(50, 100, 0.95)
+    assert (lower, upper) == pytest.approx((0.40383, 0.59617), abs=1e-5)
+    lower, upper = wilson_interval(100, 100, 0.95)
+    assert lower == pytest.approx(0.96301, abs=1e-5)
+    assert upper == 1.0
+
+
+def test_wilson_interval_without_reads_and_narrowing() -> None:
+    assert wilson_interval(0, 0, 0.99) == (0.0, 1.0)
+    widths = [upper - lower for lower, upper in (wilson_interval(n // 10, n, 0.99) for n in [10, 100, 1000])]
+    assert widths == sorted(widths, reverse=True)
+    # higher confidence, wider interval
+    assert wilson_interval(5, 100, 0.99)[1] > wilson_interval(5, 100, 0.95)[1]
+
+
+def test_stop_reason() -> None:
+    config = {"reps_per_file": 500, "early_stop": {"violations": 10}}
+    assert stop_reason({"num_reps": 100, "num_reads_with_violations": 0}, config) is None
+    assert stop_reason({"num_reps": 500, "num_reads_with_violations": 0}, config) == "reps_per_file reached"
+    assert stop_reason({"num_reps": 100, "num_reads_with_violations": 10}, config) == "violation target reached"
+
+    config["early_stop"] = {"max_violation_rate": 0.02, "confidence": 0.99}
+    # the upper bound of a clean cell drops below 0.02 after 326 reads
+    assert stop_reason({"num_reps": 325, "num_reads_with_violations": 0}, config) is None
+    assert stop_reason({"num_reps": 326, "num_reads_with_violations": 0}, config) == (
+        "violation rate below max_violation_rate"
+    )
+    assert stop_reason({"num_reps": 100, "num_reads_with_violations": 20}, config) == (
+        "violation rate above max_violation_rate"
+    )
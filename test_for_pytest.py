@@ -1,45 +1,117 @@
+import os
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
 import polars as pl
 import pytest
-from polars.testing import assert_frame_equal
 
-# File path to the parquet file
-file_path = "synthetic_parquet_files/polars/data_000.parquet"
+from buffer_hashing import row_digests
+from parquet_manifest import CATALOG_FILE_NAME, read_catalog
+from read_engines import with_read_columns
+from reference_data import Reference, load_reference
+from test_read_parquet_file import list_set_up, sort_by_date, violations_in_read
+
+# Configuration
+DIR_PARQUET_FILES = Path("synthetic_parquet_files")
+# Layouts (writer library or writer options, see the catalog) to test, None: all layouts in the catalog
+LAYOUTS: list[str] | None = ["polars", "pandas"]
+# Engines (name_test of list_set_up in test_read_parquet_file.py), None: all
+ENGINES: list[str] | None = None
+# Every repetition is a test item of its own, so pytest-xdist (`pytest -n auto`) spreads them over the cores
+NUM_REPS = 10
+# Every column is read and compared against its reference, a scalar column like `date` as a whole
+COLS_TO_CHECK = ["date", "value", "value2"]
+RTOL = 1e-7
+ATOL = 1e-10
+LATENCY_DIR = Path("results_check_parquet_file/pytest_latencies")
+
+SET_UPS = {set_up["name_test"]: set_up for set_up in list_set_up}
+
+
+def catalog_files() -> list[tuple[str, Path]]:
+    """(layout, path) of the files to test, none before create_parquet_files.py has written the catalog."""
+    if not (DIR_PARQUET_FILES / CATALOG_FILE_NAME).exists():
+        return []
+    catalog = read_catalog(DIR_PARQUET_FILES).sort("layout", "file_idx")
+    if LAYOUTS is not None:
+        catalog = catalog.filter(pl.col("layout").is_in(LAYOUTS))
+    return [(layout, Path(path)) for layout, path in catalog.select("layout", "path").rows()]
 
 
-def df_generator(file_path):
-    """Lazily yield 100 DataFrames by reading the parquet file."""
-    for _ in range(100):
-        yield pl.read_parquet(file_path)
+FILES = catalog_files()
 
 
-def pair_generator(file_path):
+@pytest.fixture(scope="session")
+def reference(tmp_path_factory: pytest.TempPathFactory) -> Callable[[Path, str], Reference]:
     """
-    Lazily yield each unique pair (old_df, new_df) from the generator.
-    Only previously seen DataFrames are kept in memory.
+    Reference of a column of a file, decoded once per session (per xdist worker) and shared by all tests of the file.
+    Every session writes its references to a temporary folder of its own, so concurrent workers never write the same
+    file.
     """
-    gen = df_generator(file_path)
-    old_df = next(gen)
-    for new_df in gen:
-        yield old_df, new_df
-        old_df = new_df
-
-
-def test_dataframes_are_identical():
-    """Test that all dataframes generated from the parquet file are identical."""
-    # Use the pair generator to compare each pair
-    for i, (df1, df2) in enumerate(pair_generator(file_path)):
-        print(f"On comparison: {i}")
-        try:
-            assert_frame_equal(df1, df2)
-            print(f"Comparison {i} passed!")
-        except AssertionError as e:
-            print(f"Comparison {i} FAILED!")
-            print(f"Error details: {e}")
-            pytest.fail(f"DataFrames at comparison {i} are not equal. Error: {e}")
-
-    print("All tested DataFrames are identical!")
-
-
-# This allows the test to be run with `python -m pytest test_file.py -v`
+    reference_dir = tmp_path_factory.mktemp("reference_data")
+    references: dict[tuple[Path, str], Reference] = {}
+
+    def get(path_file: Path, col: str) -> Reference:
+        if (path_file, col) not in references:
+            references[(path_file, col)] = load_reference(path_file, col, reference_dir)
+        return references[(path_file, col)]
+
+    return get
+
+
+@pytest.fixture(scope="session")
+def read_latencies() -> Iterator[list[dict[str, Any]]]:
+    """Latencies of all reads of the session, written to LATENCY_DIR when it ends (one file per xdist worker)."""
+    latencies: list[dict[str, Any]] = []
+    yield latencies
+    if latencies:
+        LATENCY_DIR.mkdir(parents=True, exist_ok=True)
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        pl.DataFrame(latencies).write_parquet(LATENCY_DIR / f"read_latencies_{worker}.parquet")
+
+
+@pytest.fixture
+def timed_read(
+    read_latencies: list[dict[str, Any]], record_property: Callable[[str, Any], None], request: pytest.FixtureRequest
+) -> Callable[[Callable[[Path], Any], Path], Any]:
+    """Read a file and record the latency of the read (also as property `read_latency_s` of the test in junitxml)."""
+
+    def read(read_parquet_file: Callable[[Path], Any], path_file: Path) -> Any:
+        time_start = time.perf_counter()
+        df = read_parquet_file(path_file)
+        latency_s = time.perf_counter() - time_start
+        record_property("read_latency_s", latency_s)
+        read_latencies.append({**request.node.callspec.params, "path_file": str(path_file), "latency_s": latency_s})
+        return df
+
+    return read
+
+
+@pytest.mark.parametrize("rep", range(NUM_REPS))
+@pytest.mark.parametrize("name_test", list(SET_UPS) if ENGINES is None else ENGINES)
+@pytest.mark.parametrize("layout,path_file", FILES, ids=[f"{layout}/{path_file.stem}" for layout, path_file in FILES])
+def test_read_matches_reference(
+    layout: str,
+    path_file: Path,
+    name_test: str,
+    rep: int,
+    reference: Callable[[Path, str], Reference],
+    timed_read: Callable[[Callable[[Path], Any], Path], Any],
+) -> None:
+    """A read of all columns of the file, sorted by date, has the values of the reference within RTOL/ATOL."""
+    read_parquet_file = with_read_columns(SET_UPS[name_test]["read_parquet_file"], COLS_TO_CHECK)
+    df = sort_by_date(timed_read(read_parquet_file, path_file))
+
+    for col in COLS_TO_CHECK:
+        expected = reference(path_file, col)
+        violations = violations_in_read(
+            df, row_digests(df, col), expected.digests, expected.rows, name_test, path_file, col, RTOL, ATOL
+        )
+        assert not violations, f"{len(violations)} rows of {col} of {path_file} differ from the reference in rep {rep}"
+
+
+# This allows the tests to be run with `python test_for_pytest.py`, in parallel with `pytest -n auto test_for_pytest.py`
 if __name__ == "__main__":
-    test_dataframes_are_identical()
+    raise SystemExit(pytest.main([__file__]))
@@ -1,6 +1,10 @@
 # %%
-import hashlib
-import shutil
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import Any, Callable
 
@@ -9,13 +13,271 @@ import pandas as pd
 import polars as pl
 from tqdm import tqdm
 
+from buffer_hashing import (
+    column_rows,
+    combined_digest,
+    digest_column,
+    list_column_rows,
+    row_digests,
+    verify_row_digests,
+)
+from comparison import find_mismatches
+from instrumentation import SlowRepProfiler, phase
+from read_engines import (
+    ArrowRead,
+    FileBytes,
+    PolarsMmapRead,
+    PolarsScan,
+    load_file_bytes,
+    measure_read,
+    to_pandas_arrow_dtype,
+    to_pandas_split_blocks,
+    to_polars,
+    with_read_columns,
+)
+from reference_data import Reference, ensure_reference
+from rep_scheduler import ExecutorKind, make_executor, map_ordered
+from violation_forensics import localize_violation
 
-def hash_dataframe_polars(df, col_to_check):
-    return hashlib.sha256(df.select(col_to_check).explode(col_to_check).write_csv(None).encode()).hexdigest()
 
+def sort_by_date(df: pl.DataFrame | pd.DataFrame) -> pl.DataFrame | pd.DataFrame:
+    if isinstance(df, pd.DataFrame):
+        return df.sort_values(by=["date"])
+    elif isinstance(df, pl.DataFrame):
+        return df.sort("date")
+    else:
+        raise ValueError("Unknown DataFrame type")
 
-def hash_dataframe_pandas(df, col_to_check):
-    return hashlib.sha256(df[col_to_check].to_csv().encode()).hexdigest()
+
+def read_and_hash(
+    read_parquet_file: Callable[[Path], Any],
+    hash_fun: Callable[[Any], np.ndarray],
+    path_file: Path | FileBytes,
+    event_fields: dict[str, Any] | None = None,
+    profiler: SlowRepProfiler | None = None,
+) -> tuple[pl.DataFrame | pd.DataFrame | None, np.ndarray | None, str | None, list[dict[str, Any]]]:
+    """
+    One repetition: read (measuring its memory use, see read_engines.py), sort and hash, each phase recorded as an
+    event with the identifiers in `event_fields` (see instrumentation.py). `path_file` can also be the cached bytes
+    of the file. Read errors are returned instead of raised. With `profiler` a slow repetition is profiled, its
+    events hold the path of the profile.
+    """
+    event_fields = {} if event_fields is None else event_fields
+    events: list[dict[str, Any]] = []
+    df = digests = error = None
+    path = path_file.path_file if isinstance(path_file, FileBytes) else path_file
+    name_profile = f"{event_fields.get('name_test')}_{path.parent.name}_{path.stem}"
+    name_profile += f"_rep{event_fields.get('rep')}"
+    with profiler.profile(name_profile) if profiler is not None else nullcontext({"profile": None}) as profiled:
+        try:
+            with phase(events, "read", **event_fields) as event:
+                df, read_stats = measure_read(read_parquet_file, path_file)
+                event.update(read_stats)
+            with phase(events, "sort", **event_fields):
+                df = sort_by_date(df)
+        except Exception as e:
+            df, error = None, str(e)
+        if error is None:
+            with phase(events, "hash", **event_fields) as event:
+                digests = hash_fun(df)
+                event["digest"] = combined_digest(digests)
+
+    for event in events:
+        event["profile"] = profiled["profile"]
+    return df, digests, error, events
+
+
+def violations_in_read(
+    df: pl.DataFrame | pd.DataFrame,
+    digests: np.ndarray,
+    expected_digests: np.ndarray | None,
+    expected_rows: Callable[[], list[np.ndarray]] | None,
+    name_test: str,
+    path_file: Path,
+    col_to_check: str,
+    rtol: float,
+    atol: float,
+) -> list[dict[str, Any]]:
+    """
+    Violations of one read, only rows whose digest differs from the expected one are compared. Without
+    `expected_digests` the rows are checked against the digests read with them (see buffer_hashing.verify_row_digests).
+    Without `expected_rows` there are no values to compare to, every differing row is a violation without elements.
+    """
+    if expected_digests is None:
+        rows_changed = verify_row_digests(df, col_to_check, digests)
+    elif len(digests) != len(expected_digests):
+        raise ValueError("Number of rows differ")
+    else:
+        rows_changed = np.flatnonzero(digests != expected_digests)
+    if len(rows_changed) == 0:
+        return []
+
+    tqdm.write(f"{name_test}, hashes differ for file {path_file}")
+    rows_1 = column_rows(df[col_to_check])
+    if expected_rows is None:
+        tqdm.write(f"{len(rows_changed)} rows differ from their expected digests")
+        return [
+            {
+                "name_test": name_test,
+                "length_1": len(rows_1[row_index]),
+                "length_2": None,
+                "data_1": [],
+                "data_2": [],
+                "indices_violation": [],
+                "row_index": row_index,
+            }
+            for row_index in rows_changed.tolist()
+        ]
+    rows_2 = expected_rows()
+    row_indices, element_indices = find_mismatches(rows_1, rows_2, rtol, atol, rows=rows_changed.tolist())
+
+    violations = []
+    for row_index in np.unique(row_indices).tolist():
+        indices_violation = element_indices[row_indices == row_index]
+        data_1 = rows_1[row_index]
+        data_2 = rows_2[row_index]
+        tqdm.write(f"Precision violation found for {len(indices_violation)} elements")
+
+        violations.append(
+            {
+                "name_test": name_test,
+                "length_1": len(data_1),
+                "length_2": len(data_2),
+                "data_1": data_1[indices_violation].tolist(),
+                "data_2": data_2[indices_violation].tolist(),
+                "indices_violation": indices_violation.tolist(),
+                "row_index": row_index,
+            }
+        )
+    return violations
+
+
+def check_read_against_reference(
+    read_parquet_file: Callable[[Path], Any],
+    hash_fun: Callable[[Any], np.ndarray],
+    path_file: Path | FileBytes,
+    paths_reference: dict[str, Path],
+    name_test: str,
+    col_to_check: str,
+    rtol: float,
+    atol: float,
+    event_fields: dict[str, Any] | None = None,
+    profiler: SlowRepProfiler | None = None,
+) -> tuple[list[dict[str, Any]], str | None, list[dict[str, Any]]]:
+    """One repetition checked completely in a worker process, only the violations and events travel back."""
+    df, digests, error, events = read_and_hash(read_parquet_file, hash_fun, path_file, event_fields, profiler)
+    if error is not None:
+        return [], error, events
+    reference = Reference.from_paths(paths_reference)
+    with phase(events, "compare", **(event_fields or {})) as event:
+        violations = violations_in_read(
+            df,  # type: ignore
+            digests,  # type: ignore
+            reference.digests,
+            reference.rows,
+            name_test,
+            path_file,
+            col_to_check,
+            rtol,
+            atol,
+        )
+        event["num_violations"] = len(violations)
+    return violations, None, events
+
+
+RepetitionTask = tuple[Path, dict[str, Path] | None, dict[str, Any]]
+
+
+def repetition_stream(
+    paths_parquet_files: list[Path],
+    paths_reference: list[dict[str, Path] | None],
+    file_indices: list[int],
+    reps: range,
+    in_memory: bool,
+    fields: dict[str, Any],
+) -> tuple[list[RepetitionTask], Iterator[Path | FileBytes]]:
+    """
+    The repetitions of all files in order (path, reference paths, `fields` with file index and rep) and lazily the
+    source of each read: the path or, with `in_memory`, the bytes of the file, loaded when its first repetition is
+    submitted and released after its last one.
+    """
+    tasks = [
+        (path_file, paths_reference_file, {**fields, "file_index": i, "rep": rep})
+        for i, path_file, paths_reference_file in zip(file_indices, paths_parquet_files, paths_reference)
+        for rep in reps
+    ]
+
+    def sources() -> Iterator[Path | FileBytes]:
+        source: Path | FileBytes = Path()
+        for path_file, _, fields_task in tasks:
+            if fields_task["rep"] == reps[0]:
+                source = load_file_bytes(path_file) if in_memory else path_file
+            yield source
+
+    return tasks, sources()
+
+
+@dataclass
+class ExpectedValues:
+    """
+    What the reads of one file are compared to: the reference data, the digests embedded in the file, or else the
+    previous read. `last_digests` (by file index) is shared by the batches of a run, so the first read of a batch is
+    compared to the digests of the last read of the previous batch, per row and without elements.
+    """
+
+    reference: Reference | None
+    embedded_digests: bool
+    last_digests: dict[int, np.ndarray]
+    file_index: int
+    previous_df: pl.DataFrame | pd.DataFrame | None = None
+
+    def select(self, col_to_check: str) -> tuple[np.ndarray | None, Callable[[], list[np.ndarray]] | None] | None:
+        """Expected digests and rows of the next read (see violations_in_read), None if there is nothing to compare."""
+        if self.reference is not None:
+            return self.reference.digests, self.reference.rows
+        if self.embedded_digests:
+            return None, None
+        previous_digests = self.last_digests.get(self.file_index)
+        if previous_digests is None:
+            return None
+        rows = partial(list_column_rows, self.previous_df[col_to_check]) if self.previous_df is not None else None
+        return previous_digests, rows
+
+    def record(self, df: pl.DataFrame | pd.DataFrame, digests: np.ndarray) -> None:
+        """Without reference data or embedded digests the next read is compared to this one."""
+        if self.reference is None and not self.embedded_digests:
+            self.last_digests[self.file_index] = digests
+            self.previous_df = df
+
+
+def file_summary(
+    events_file: list[dict[str, Any]],
+    fields: dict[str, Any],
+    path_file: Path,
+    num_reps_per_file: int,
+    duration: float,
+    prefetch: int,
+) -> dict[str, Any]:
+    """Number of reads of a file with the largest memory use of a read, also written as a line with the throughput."""
+    read = {name: fields[name] for name in ["name_test", "file_index"]}
+    read["num_reads"] = num_reps_per_file
+    for name in ["copied_num_bytes", "arrow_allocated_num_bytes", "rss_delta_num_bytes"]:
+        values = [e[name] for e in events_file if e["phase"] == "read" and e.get(name) is not None]
+        read[f"{name}_max"] = max(values) if values else None
+    wall_phases = {
+        name: np.mean([e["wall_s"] for e in events_file if e["phase"] == name])
+        for name in ["read", "sort", "hash", "compare"]
+        if any(e["phase"] == name for e in events_file)
+    }
+    tqdm.write(
+        f"{fields['name_test']}: {num_reps_per_file} reads of {path_file} in {duration:.1f} s "
+        f"({num_reps_per_file / duration:.2f} reads/s, {fields['num_workers']} workers, prefetch {prefetch}"
+        f"{', from memory' if fields['in_memory'] else ''}), "
+        f"copied {read['copied_num_bytes_max']} bytes, arrow pool +{read['arrow_allocated_num_bytes_max']} bytes, "
+        f"RSS +{read['rss_delta_num_bytes_max']} bytes, mean wall time per phase "
+        + ", ".join(f"{name} {wall_s * 1000:.1f} ms" for name, wall_s in wall_phases.items())
+    )
+    return {**read, "num_workers": fields["num_workers"], "in_memory": fields["in_memory"]}
 
 
 def find_precision_violations(
@@ -23,75 +285,161 @@ def find_precision_violations(
     name_test: str,
     rtol: float,
     atol: float,
-    hash_fun: Callable[[Any], str],
+    hash_fun: Callable[[Any], np.ndarray],
     read_parquet_file: Callable[[Path], Any],
     num_reps_per_file: int,
     col_to_check: str,
-    output_dir: Path,
-) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    output_dir: Path | None,
+    reference_dir: Path | None = None,
+    num_workers: int = 1,
+    executor: ExecutorKind = "thread",
+    max_in_flight: int | None = None,
+    forensics_dir: Path | None = None,
+    profiler: SlowRepProfiler | None = None,
+    file_indices: list[int] | None = None,
+    first_rep: int = 0,
+    prefetch: int = 0,
+    in_memory: bool = False,
+    embedded_digests: bool = False,
+    last_digests: dict[int, np.ndarray] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Read every file `num_reps_per_file` times and record the elements of `col_to_check` that are not close, comparing
+    each read to the reference data in `reference_dir`, the digests embedded in the file or the previous read (see
+    ExpectedValues). Returns the violations, the read errors, the reads per file (see file_summary) and one event per
+    phase of every repetition (see instrumentation.py).
+
+    The repetitions of all files are verified in order (see repetition_stream) while up to `max_in_flight` (default:
+    num_workers + prefetch) further reads are in progress; the "process" executor checks each read in its worker.
+    `forensics_dir` localizes the violations (see violation_forensics.py). `file_indices`, `first_rep` and
+    `last_digests` continue a run split into batches (see experiment_runner.py). Violations and errors are also
+    written to `output_dir` unless it is None.
+    """
+    if executor == "process" and reference_dir is None:
+        raise ValueError("The process executor compares against reference data, reference_dir is required")
+    if executor == "process" and num_workers > 1 and in_memory:
+        raise ValueError("The cached bytes of in_memory are shared by threads, use the thread executor")
+    if embedded_digests and (reference_dir is not None or forensics_dir is not None):
+        raise ValueError("embedded_digests replaces the reference data and has no values to localize")
+    if embedded_digests and executor == "process" and num_workers > 1:
+        raise ValueError("The embedded digests are checked in the main process, use the thread executor")
+
+    if embedded_digests:
+        # the digests are read with the data, every read is verified on its own
+        read_parquet_file = with_read_columns(read_parquet_file, ["date", col_to_check, digest_column(col_to_check)])
+    last_digests = {} if last_digests is None else last_digests
+
     precision_violated = []
     errors_reading_files = []
+    reads = []
+    events = []
+    max_in_flight = num_workers + prefetch if max_in_flight is None else max_in_flight
+    pool = None
+    if num_workers > 1:
+        pool = make_executor(executor, num_workers)
+    elif prefetch > 0:
+        # a single background reader
+        pool = make_executor("thread", 1)
+    check_in_worker = executor == "process" and num_workers > 1
 
-    # Ensure output directory exists
-    output_dir.mkdir(parents=True, exist_ok=True)
+    file_indices = list(range(len(paths_parquet_files))) if file_indices is None else file_indices
+    reps = range(first_rep, first_rep + num_reps_per_file)
+    # all references exist before the first read, reads of the next file start while a file is still verified
+    paths_reference = [
+        ensure_reference(path_file, col_to_check, reference_dir) if reference_dir else None
+        for path_file in paths_parquet_files
+    ]
+    fields_run = {"name_test": name_test, "num_workers": num_workers, "in_memory": in_memory}
+    tasks, sources = repetition_stream(paths_parquet_files, paths_reference, file_indices, reps, in_memory, fields_run)
+
+    if check_in_worker:
+        args_check = (read_parquet_file, hash_fun)
+        args_tasks = (
+            (*args_check, source, paths_reference_file, name_test, col_to_check, rtol, atol, fields, profiler)
+            for (_, paths_reference_file, fields), source in zip(tasks, sources)
+        )
+        results = map_ordered(check_read_against_reference, args_tasks, pool, max_in_flight)
+    else:
+        args_tasks = (
+            (read_parquet_file, hash_fun, source, fields, profiler) for (_, _, fields), source in zip(tasks, sources)
+        )
+        results = map_ordered(read_and_hash, args_tasks, pool, max_in_flight)
+
+    # Use tqdm to monitor the repetitions of all files
+    for (path_file, paths_reference_file, fields), result in zip(
+        tasks, tqdm(results, total=len(tasks), desc=f"Reads of {name_test}")
+    ):
+        file_index, rep = fields["file_index"], fields["rep"]
+        if rep == reps[0]:
+            reference = Reference.from_paths(paths_reference_file) if paths_reference_file is not None else None
+            expected = ExpectedValues(reference, embedded_digests, last_digests, file_index)
+            events_file = []
+            time_start = time.perf_counter()
+
+        if check_in_worker:
+            violations, error, events_rep = result
+        else:
+            df, digests, error, events_rep = result
+            violations = []
+            selected = expected.select(col_to_check) if error is None else None
+            if selected is not None:
+                with phase(events_rep, "compare", **fields) as event:
+                    violations = violations_in_read(
+                        df,  # type: ignore
+                        digests,  # type: ignore
+                        *selected,
+                        name_test,
+                        path_file,
+                        col_to_check,
+                        rtol,
+                        atol,
+                    )
+                    event["num_violations"] = len(violations)
+            if error is None:
+                expected.record(df, digests)  # type: ignore
+        events_file += events_rep
 
-    # Use tqdm to monitor file processing
-    for file_index, path_file in enumerate(tqdm(paths_parquet_files, desc=f"Processing {name_test} Files")):
-        previous_hash = None
-        previous_df = None
-
-        # Use tqdm to monitor repetitions per file
-        for rep in tqdm(range(num_reps_per_file), desc=f"Reps for File {file_index}", leave=False):
-            try:
-                df: pl.DataFrame | pd.DataFrame = read_parquet_file(path_file)
-
-                if isinstance(df, pd.DataFrame):
-                    df = df.sort_values(by=["date"])
-                elif isinstance(df, pl.DataFrame):
-                    df = df.sort("date")
-                else:
-                    raise ValueError("Unknown DataFrame type")
-
-            except Exception as e:
-                errors_reading_files.append(
-                    {"name_test": name_test, "file_index": file_index, "rep": rep, "error": str(e)}
+        if error is not None:
+            errors_reading_files.append(
+                {
+                    "name_test": name_test,
+                    "file_index": file_index,
+                    "rep": rep,
+                    "num_workers": num_workers,
+                    "in_memory": in_memory,
+                    "error": error,
+                }
+            )
+        else:
+            for violation in violations:
+                violation.update(
+                    {"rep": rep, "file_index": file_index, "num_workers": num_workers, "in_memory": in_memory}
                 )
-                continue
-
-            hash = hash_fun(df)
-            if hash != previous_hash and previous_hash is not None:
-                tqdm.write(f"{name_test}, hashes differ for file {path_file}")
-
-                for row_index in range(df.shape[0]):
-                    data_1 = np.asarray(df[col_to_check][row_index])
-                    data_2 = np.asarray(previous_df[col_to_check][row_index])  # type: ignore
-                    mask = ~np.isclose(data_1, data_2, rtol=rtol, atol=atol)
-
-                    if len(data_1) != len(data_2):
-                        raise ValueError("Lengths differ")
-
-                    if np.any(mask):
-                        tqdm.write(f"Precision violation found for {sum(mask)} elements")
-                        indices_violation = np.where(mask)[0].tolist()
-
-                        precision_violated.append(
-                            {
-                                "name_test": name_test,
-                                "length_1": len(data_1),
-                                "length_2": len(data_2),
-                                "data_1": data_1[mask].tolist(),
-                                "data_2": data_2[mask].tolist(),
-                                "indices_violation": indices_violation,
-                                "row_index": row_index,
-                                "rep": rep,
-                                "file_index": file_index,
-                            }
-                        )
-
-            previous_hash = hash
-            previous_df = df
+                # a violation against the digests of the previous batch has no elements to localize
+                if forensics_dir is not None and violation["indices_violation"]:
+                    with phase(events_file, "localize", **fields):
+                        localization = localize_violation(path_file, violation, col_to_check, forensics_dir)
+                    tqdm.write(
+                        f"{name_test}, violation in row group {localization['row_group']}, data pages "
+                        f"{localization['data_pages']}: {localization['classification']} "
+                        f"(localized in {localization['localization_ms']:.0f} ms)"
+                    )
+                    violation.update(localization)
+            precision_violated += violations
+
+        if rep == reps[-1]:
+            duration = time.perf_counter() - time_start
+            reads.append(file_summary(events_file, fields, path_file, num_reps_per_file, duration, prefetch))
+            events += events_file
+
+    if pool is not None:
+        pool.shutdown()
+
+    if output_dir is None:
+        return precision_violated, errors_reading_files, reads, events
 
     # Convert results to Polars DataFrame and save as Parquet
+    output_dir.mkdir(parents=True, exist_ok=True)
     if precision_violated:
         df_precision_violated = pl.DataFrame(precision_violated)
         df_precision_violated.write_parquet(output_dir / f"precision_violations_{name_test}.parquet")
@@ -100,85 +448,63 @@ def find_precision_violations(
         df_errors = pl.DataFrame(errors_reading_files)
         df_errors.write_parquet(output_dir / f"errors_reading_files_{name_test}.parquet")
 
-    return precision_violated, errors_reading_files
+    return precision_violated, errors_reading_files, reads, events
 
 
 col_to_check = "value"
+# partials instead of lambdas, so that the set ups can be sent to worker processes
 list_set_up = [
     {
         "name_test": "polars_rust",
-        "read_parquet_file": lambda path_file: pl.read_parquet(
-            path_file, columns=["date", col_to_check], use_pyarrow=False
-        ),
-        "hash_fun": lambda df: hash_dataframe_polars(df, col_to_check),
+        "read_parquet_file": partial(pl.read_parquet, columns=["date", col_to_check], use_pyarrow=False),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
     },
     {
         "name_test": "pandas_pyarrow",
-        "read_parquet_file": lambda path_file: pd.read_parquet(
-            path_file, columns=["date", col_to_check], engine="pyarrow"
-        ),
-        "hash_fun": lambda df: hash_dataframe_pandas(df, col_to_check),
+        "read_parquet_file": partial(pd.read_parquet, columns=["date", col_to_check], engine="pyarrow"),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
     },
     # {
     #     "name_test": "pandas_fastparquet",
-    #     "read_parquet_file": lambda path_file: pd.read_parquet(
-    #         path_file, columns=["date", col_to_check], engine="fastparquet"
-    #     ),
-    #     "hash_fun": lambda df: hash_dataframe_pandas(df, col_to_check),
+    #     "read_parquet_file": partial(pd.read_parquet, columns=["date", col_to_check], engine="fastparquet"),
+    #     "hash_fun": partial(row_digests, col_to_check=col_to_check),
     # },
     {
         "name_test": "polars_pyarrow",
-        "read_parquet_file": lambda path_file: pl.read_parquet(
-            path_file, columns=["date", col_to_check], use_pyarrow=True
-        ),
-        "hash_fun": lambda df: hash_dataframe_polars(df, col_to_check),
+        "read_parquet_file": partial(pl.read_parquet, columns=["date", col_to_check], use_pyarrow=True),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
+    },
+    # zero-copy paths: pyarrow decodes from a memory map, the conversion shares the float buffers with arrow
+    {
+        "name_test": "pyarrow_mmap_polars",
+        "read_parquet_file": ArrowRead(to_polars, columns=["date", col_to_check]),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
+    },
+    {
+        "name_test": "pyarrow_mmap_pandas",
+        "read_parquet_file": ArrowRead(to_pandas_split_blocks, columns=["date", col_to_check]),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
+    },
+    {
+        "name_test": "pyarrow_mmap_pandas_arrow_dtype",
+        "read_parquet_file": ArrowRead(to_pandas_arrow_dtype, columns=["date", col_to_check]),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
+    },
+    {
+        "name_test": "polars_mmap",
+        "read_parquet_file": PolarsMmapRead(columns=["date", col_to_check]),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
+    },
+    # lazy scan, also reads a whole layout folder as one dataset (dataset mode of experiment_runner.py)
+    {
+        "name_test": "polars_scan",
+        "read_parquet_file": PolarsScan(columns=["date", col_to_check]),
+        "hash_fun": partial(row_digests, col_to_check=col_to_check),
     },
 ]
 
-rtol = 1e-7
-atol = 1e-10
-num_reps_per_file = 50
-root_dir_results = Path("./results_check_parquet_file")
-shutil.rmtree(root_dir_results, ignore_errors=True)
-
-for rep_full in range(10):
-    for name_df_lib in ["polars", "pandas"]:
-        all_violations = []
-        all_errors_reading_files = []
-        print("##########################################################################################")
-        print(f"loading parquet files created with {name_df_lib}:")
-        print("##########################################################################################")
-        output_dir_results = root_dir_results / name_df_lib
-        dir_parquet_files = Path("synthetic_parquet_files") / name_df_lib
-        paths_parquet_files = list(dir_parquet_files.glob("*.parquet"))
-
-        for set_up in list_set_up:
-            print("-------------------------------------------------------------")
-            print(f"checking {set_up['name_test']}")
-            print("-------------------------------------------------------------")
-
-            violations, errors_reading_files = find_precision_violations(
-                paths_parquet_files=paths_parquet_files,
-                name_test=set_up["name_test"],
-                rtol=rtol,
-                atol=atol,
-                hash_fun=set_up["hash_fun"],
-                read_parquet_file=set_up["read_parquet_file"],
-                num_reps_per_file=num_reps_per_file,
-                col_to_check=col_to_check,
-                output_dir=output_dir_results,
-            )
-
-            print(f"number of violation events {len(violations)}")
-            print(f"number of errors reading files {len(errors_reading_files)}")
-
-            all_violations += violations
-            all_errors_reading_files += errors_reading_files
+if __name__ == "__main__":
+    # the experiment matrix, checkpointing and early stopping live in experiment_runner.py
+    from experiment_runner import DEFAULT_CONFIG, load_config, run_experiment
 
-        violations_df = pd.DataFrame(all_violations)
-        violations_df.to_csv(output_dir_results / "all_violations.csv", mode="a", header=False, index=False)
-
-        errors_reading_files_df = pd.DataFrame(all_errors_reading_files)
-        errors_reading_files_df.to_csv(
-            output_dir_results / "all_errors_reading_files.csv", mode="a", header=False, index=False
-        )
+    run_experiment(load_config(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONFIG))
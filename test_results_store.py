@@ -0,0 +1,44 @@
+from typing import Any
+
+import polars as pl
+
+from results_store import SCHEMAS, violation_counts
+
+KEYS = ["writer_lib", "engine", "file_index", "in_memory"]
+
+
+def stored_violations(records: list[dict[str, Any]]) -> pl.LazyFrame:
+    """Violations as scanned from the store (table schema plus the partition columns)."""
+    schema = pl.Schema({**SCHEMAS["violations"], "run_id": pl.String, "writer_lib": pl.String, "engine": pl.String})
+    return pl.LazyFrame([{name: record.get(name) for name in schema} for record in records], schema=schema)
+
+
+def violation(rep: int, indices_violation: list[int], row_index: int = 0) -> dict[str, Any]:
+    return {
+        "run_id": "run",
+        "writer_lib": "polars",
+        "engine": "polars_rust",
+        "file_index": 0,
+        "in_memory": False,
+        "num_workers": 1,
+        "rep": rep,
+        "row_index": row_index,
+        "data_1": [1.0] * len(indices_violation),
+        "data_2": [2.0] * len(indices_violation),
+        "indices_violation": indices_violation,
+    }
+
+
+def test_violation_counts_per_read_and_element() -> None:
+    lf = stored_violations([violation(0, [3, 5]), violation(0, [1], row_index=1), violation(2, [7])])
+    counts = violation_counts(lf, KEYS).collect()
+    assert counts["num_reads_with_violations"].to_list() == [2]
+    assert counts["total_violations"].to_list() == [4]
+
+
+def test_violation_without_elements_counts_as_read_with_violations() -> None:
+    # embedded_digests mode stores violations with empty data_1/data_2/indices_violation
+    lf = stored_violations([violation(rep, []) for rep in range(4)])
+    counts = violation_counts(lf, KEYS).collect()
+    assert counts["num_reads_with_violations"].to_list() == [4]
+    assert counts["total_violations"].to_list() == [0]
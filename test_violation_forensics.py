@@ -0,0 +1,115 @@
+import json
+from itertools import pairwise
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from violation_forensics import _CompactReader, classify, column_chunk_pages, column_chunk_range, localize_violation
+
+# PageHeader {1: type DATA_PAGE, 2: uncompressed size 100, 3: compressed size 80,
+#             5: DataPageHeader {1: num_values 1000, 2: encoding 0}} in the thrift compact protocol
+DATA_PAGE_HEADER_BYTES = bytes(
+    [0x15, 0x00, 0x15, 0xC8, 0x01, 0x15, 0xA0, 0x01, 0x2C, 0x15, 0xD0, 0x0F, 0x15, 0x00, 0x00, 0x00]
+)
+
+
+def test_compact_reader_decodes_a_page_header() -> None:
+    reader = _CompactReader(DATA_PAGE_HEADER_BYTES + b"body")
+    assert reader.struct() == {1: 0, 2: 100, 3: 80, 5: {1: 1000, 2: 0}}
+    # the header ends where the page body starts
+    assert reader.pos == len(DATA_PAGE_HEADER_BYTES)
+
+
+def test_compact_reader_zigzag_varint_list_and_long_field_id() -> None:
+    # field 1: i64 -3, field 20 (long form, zigzag id 40): list of 2 i32 [1, -1], field 21: binary b"ab", bool true
+    data = bytes([0x16, 0x05, 0x09, 0x28, 0x25, 0x02, 0x01, 0x18, 0x02]) + b"ab" + bytes([0x11, 0x00])
+    assert _CompactReader(data).struct() == {1: -3, 20: [1, -1], 21: b"ab", 22: True}
+
+
+def test_compact_reader_rejects_unknown_types() -> None:
+    with pytest.raises(ValueError):
+        _CompactReader(bytes([0x1D])).struct()
+
+
+@pytest.mark.parametrize("use_dictionary", [False, True])
+def test_column_chunk_pages_cover_the_chunk(tmp_path: Path, use_dictionary: bool) -> None:
+    path_file = tmp_path / "data.parquet"
+    values = np.random.default_rng(0).random((8, 1000))
+    if use_dictionary:
+        # few distinct values, so the chunk starts with a dictionary page
+        values = np.round(values, 1)
+    table = pa.table({"date": np.arange(8), "value": pa.array(list(values), type=pa.list_(pa.float64()))})
+    pq.write_table(table, path_file, data_page_size=16 * 1024, use_dictionary=use_dictionary)
+
+    pages = column_chunk_pages(path_file, 0, "value")
+    data_pages = [page for page in pages if page.page_type in ("DATA_PAGE", "DATA_PAGE_V2")]
+    start, num_bytes = column_chunk_range(pq.read_metadata(path_file), 0, "value")
+    assert (pages[0].page_type == "DICTIONARY_PAGE") == use_dictionary
+    assert use_dictionary or len(data_pages) > 1
+    # the pages follow each other without gaps and fill the column chunk
+    assert pages[0].offset == start
+    assert all(page.offset + page.num_bytes == next_page.offset for page, next_page in pairwise(pages))
+    assert sum(page.num_bytes for page in pages) == num_bytes
+    # every element is counted once, first_value is the running count of the data pages
+    assert sum(page.num_values for page in data_pages) == values.size
+    assert [page.first_value for page in data_pages] == list(np.cumsum([0] + [p.num_values for p in data_pages[:-1]]))
+
+
+def test_classify() -> None:
+    assert classify(num_expected=10, num_observed=0, num_rereads=10) == "transient"
+    assert classify(num_expected=0, num_observed=10, num_rereads=10) == "persistent"
+    assert classify(num_expected=4, num_observed=6, num_rereads=10) == "intermittent"
+
+
+@pytest.mark.parametrize("fault_in_file", [False, True])
+def test_localize_violation_of_a_synthetic_fault(tmp_path: Path, fault_in_file: bool) -> None:
+    num_rows, list_length, row_group_size = 12, 500, 4
+    # a row in the middle of the second row group
+    file_row, element = 6, 321
+    rng = np.random.default_rng(0)
+    values = rng.random((num_rows, list_length))
+    # the file is not sorted by date, so the row of the sorted read differs from the row of the file
+    dates = rng.permutation(num_rows)
+    assert dates[file_row] != file_row
+    table = pa.table({"date": dates, "value": pa.array(list(values), type=pa.list_(pa.float64()))})
+    path_file = tmp_path / "data.parquet"
+    pq.write_table(table, path_file, row_group_size=row_group_size, data_page_size=1024, use_dictionary=False)
+
+    row_index = int(dates[file_row])
+    stored = values[file_row, element]
+    flipped = (np.array([stored]).view(np.uint64) ^ np.uint64(1 << 40)).view(np.float64)[0]
+    # a transient fault: the read returned the flipped value, the file holds the expected one;
+    # a fault in the file: the reference (expected) differs from what every read of the file returns
+    observed, expected = (stored, flipped) if fault_in_file else (flipped, stored)
+    violation = {
+        "row_index": row_index,
+        "rep": 3,
+        "indices_violation": [element],
+        "data_1": [observed],
+        "data_2": [expected],
+    }
+
+    localization = localize_violation(path_file, violation, "value", tmp_path / "forensics", num_rereads=2)
+    assert localization["file_row"] == file_row
+    assert localization["row_group"] == 1
+    position = 2 * list_length + element
+    pages = column_chunk_pages(path_file, localization["row_group"], "value")
+    expected_pages = [
+        page.page_index
+        for page in pages
+        if page.first_value is not None and page.first_value <= position < page.first_value + page.num_values
+    ]
+    assert len(expected_pages) == 1
+    assert localization["data_pages"] == expected_pages
+    assert localization["classification"] == ("persistent" if fault_in_file else "transient")
+    assert localization["max_flipped_bits"] == 1
+
+    description = json.loads(next((tmp_path / "forensics").glob("*.json")).read_text())
+    assert [page["page_index"] for page in description["pages"]] == expected_pages
+    path_pages = next((tmp_path / "forensics").glob("*_pages.bin"))
+    assert path_pages.stat().st_size == sum(pages[i].num_bytes for i in expected_pages)
+    row = pq.read_table(next((tmp_path / "forensics").glob("*_row.parquet")))
+    assert row["value"][0].as_py() == values[file_row].tolist()
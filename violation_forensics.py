@@ -0,0 +1,313 @@
+"""
+Localization of precision violations in the parquet file.
+
+A violating element (row of the date-sorted DataFrame, index within the list) is mapped to its row group and to the
+data page of the column chunk that holds it, using the footer metadata and the page headers of the column chunk
+(the writers do not write a page index). Only that row group is then re-read, with pyarrow and with polars, to
+confirm and classify the fault, and the affected pages are dumped as a reproducer.
+"""
+
+import json
+import struct
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from buffer_hashing import list_column_rows
+
+NUM_REREADS = 10
+REREAD_ENGINES = ["pyarrow", "polars"]
+
+PAGE_TYPES = {0: "DATA_PAGE", 1: "INDEX_PAGE", 2: "DICTIONARY_PAGE", 3: "DATA_PAGE_V2"}
+# field ids of the num_values field holders in the thrift PageHeader
+DATA_PAGE_HEADER = 5
+DICTIONARY_PAGE_HEADER = 7
+DATA_PAGE_HEADER_V2 = 8
+
+
+class _CompactReader:
+    """Just enough of the thrift compact protocol to decode parquet page headers."""
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def byte(self) -> int:
+        b = self.data[self.pos]
+        self.pos += 1
+        return b
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            b = self.byte()
+            result |= (b & 0x7F) << shift
+            if not b & 0x80:
+                return result
+            shift += 7
+
+    def zigzag(self) -> int:
+        n = self.varint()
+        return (n >> 1) ^ -(n & 1)
+
+    def value(self, type_id: int) -> Any:
+        if type_id in (1, 2):
+            return type_id == 1
+        if type_id == 3:
+            return self.byte()
+        if type_id in (4, 5, 6):
+            return self.zigzag()
+        if type_id == 7:
+            self.pos += 8
+            return struct.unpack_from("<d", self.data, self.pos - 8)[0]
+        if type_id == 8:
+            size = self.varint()
+            self.pos += size
+            return self.data[self.pos - size : self.pos]
+        if type_id in (9, 10):
+            header = self.byte()
+            size = header >> 4 if header >> 4 != 15 else self.varint()
+            element_type = header & 0x0F
+            # booleans in lists take a byte each
+            if element_type in (1, 2):
+                return [self.byte() == 1 for _ in range(size)]
+            return [self.value(element_type) for _ in range(size)]
+        if type_id == 11:
+            size = self.varint()
+            if size == 0:
+                return {}
+            types = self.byte()
+            return {self.value(types >> 4): self.value(types & 0x0F) for _ in range(size)}
+        if type_id == 12:
+            return self.struct()
+        raise ValueError(f"Unknown thrift compact type {type_id}")
+
+    def struct(self) -> dict[int, Any]:
+        fields = {}
+        field_id = 0
+        while True:
+            header = self.byte()
+            if header == 0:
+                return fields
+            delta = header >> 4
+            field_id = field_id + delta if delta else self.zigzag()
+            fields[field_id] = self.value(header & 0x0F)
+
+
+@dataclass
+class PageLocation:
+    page_index: int
+    page_type: str
+    offset: int
+    # header and (compressed) body
+    num_bytes: int
+    num_values: int
+    # position of the first value of a data page within the column chunk
+    first_value: int | None
+
+
+def leaf_column_index(metadata: pq.FileMetaData, col: str) -> int:
+    # the leaf of a list column is e.g. `value.list.element`
+    row_group = metadata.row_group(0)
+    for j in range(row_group.num_columns):
+        if row_group.column(j).path_in_schema.split(".")[0] == col:
+            return j
+    raise ValueError(f"Column {col} not found")
+
+
+def column_chunk_range(metadata: pq.FileMetaData, row_group: int, col: str) -> tuple[int, int]:
+    column = metadata.row_group(row_group).column(leaf_column_index(metadata, col))
+    start = column.dictionary_page_offset if column.has_dictionary_page else column.data_page_offset
+    return start, column.total_compressed_size
+
+
+def column_chunk_pages(path_file: Path, row_group: int, col: str) -> list[PageLocation]:
+    """Pages of the column chunk of `col` in `row_group`, read from their headers (one read of the chunk)."""
+    start, num_bytes = column_chunk_range(pq.read_metadata(path_file), row_group, col)
+    with open(path_file, "rb") as f:
+        f.seek(start)
+        data = f.read(num_bytes)
+
+    pages = []
+    pos = 0
+    first_value = 0
+    while pos < len(data):
+        reader = _CompactReader(data, pos)
+        header = reader.struct()
+        page_type = PAGE_TYPES.get(header[1], str(header[1]))
+        # for list columns num_values counts levels, i.e. the elements as long as no list is null or empty
+        holder = header.get(DATA_PAGE_HEADER) or header.get(DATA_PAGE_HEADER_V2) or header.get(DICTIONARY_PAGE_HEADER)
+        num_values = holder[1] if holder else 0
+        is_data_page = page_type in ("DATA_PAGE", "DATA_PAGE_V2")
+        page_num_bytes = reader.pos - pos + header[3]
+        first_value_page = first_value if is_data_page else None
+        pages.append(PageLocation(len(pages), page_type, start + pos, page_num_bytes, num_values, first_value_page))
+        first_value += num_values if is_data_page else 0
+        pos += page_num_bytes
+    return pages
+
+
+def sorted_to_file_row(path_file: Path, row_index: int) -> int:
+    """Row of the file of row `row_index` of the date-sorted DataFrame."""
+    dates = pq.read_table(path_file, columns=["date"])["date"].to_numpy()
+    return int(np.argsort(dates, kind="stable")[row_index])
+
+
+def reread_row_group(path_file: Path, row_group: int, col: str, engine: str) -> list[np.ndarray]:
+    """Rows of `col` of one row group, decoded again by `engine`."""
+    if engine == "pyarrow":
+        column = pq.ParquetFile(path_file).read_row_group(row_group, columns=[col])[col]
+    elif engine == "polars":
+        metadata = pq.read_metadata(path_file)
+        start = sum(metadata.row_group(g).num_rows for g in range(row_group))
+        # the slice is pushed down, row groups outside of it are not decoded
+        df = pl.scan_parquet(path_file).select(col).slice(start, metadata.row_group(row_group).num_rows).collect()
+        column = df[col]
+    else:
+        raise ValueError(f"Unknown engine {engine}")
+    return list_column_rows(column)
+
+
+def bits(values: np.ndarray) -> np.ndarray:
+    return values.view(f"u{values.itemsize}")
+
+
+def bits_equal(values_1: np.ndarray, values_2: np.ndarray) -> bool:
+    return np.array_equal(bits(values_1), bits(values_2))
+
+
+def classify(num_expected: int, num_observed: int, num_rereads: int) -> str:
+    """
+    transient: every re-read returns the expected values, the fault happened in the original read only
+    persistent: every re-read reproduces the violating values (file content or deterministic decoder bug)
+    intermittent: re-reads disagree
+    Without reference data the expected values are those of the previous read, so a transient fault is reported
+    twice: as transient, then as persistent for the (correct) read after it.
+    """
+    if num_expected == num_rereads:
+        return "transient"
+    if num_observed == num_rereads:
+        return "persistent"
+    return "intermittent"
+
+
+def localize_violation(
+    path_file: Path,
+    violation: dict[str, Any],
+    col_to_check: str,
+    reproducer_dir: Path | None = None,
+    num_rereads: int = NUM_REREADS,
+) -> dict[str, Any]:
+    """
+    Map a violation record of find_precision_violations to its row group and data pages, re-read the row group
+    `num_rereads` times per engine and classify the fault (see classify). With `reproducer_dir` the affected pages
+    are dumped there. `data_2` is the expected value: the reference or, without reference, the previous read.
+    """
+    time_start = time.perf_counter()
+    metadata = pq.read_metadata(path_file)
+    file_row = sorted_to_file_row(path_file, violation["row_index"])
+
+    row_group = 0
+    row_in_row_group = file_row
+    while row_in_row_group >= metadata.row_group(row_group).num_rows:
+        row_in_row_group -= metadata.row_group(row_group).num_rows
+        row_group += 1
+
+    indices = np.asarray(violation["indices_violation"], dtype=np.int64)
+    observed = np.asarray(violation["data_1"], dtype=np.float64)
+    expected = np.asarray(violation["data_2"], dtype=np.float64)
+
+    rereads = {}
+    rows_group = []
+    for engine in REREAD_ENGINES:
+        num_expected = num_observed = 0
+        for _ in range(num_rereads):
+            rows_group = reread_row_group(path_file, row_group, col_to_check, engine)
+            values = rows_group[row_in_row_group][indices]
+            # the recorded values are float64, narrowing them to the stored float type (e.g. float32) is exact
+            num_expected += bits_equal(values, expected.astype(values.dtype))
+            num_observed += bits_equal(values, observed.astype(values.dtype))
+        rereads[engine] = {"num_expected": num_expected, "num_observed": num_observed}
+
+    # position of the elements within the column chunk, the rows before hold the values before
+    first_value_row = sum(len(row) for row in rows_group[:row_in_row_group])
+    positions = first_value_row + indices
+    pages = column_chunk_pages(path_file, row_group, col_to_check)
+    data_pages = [
+        page
+        for page in pages
+        if page.first_value is not None
+        and np.any((positions >= page.first_value) & (positions < page.first_value + page.num_values))
+    ]
+
+    num_expected = sum(r["num_expected"] for r in rereads.values())
+    num_observed = sum(r["num_observed"] for r in rereads.values())
+    dtype = rows_group[row_in_row_group].dtype
+    changed = bits(observed.astype(dtype)) ^ bits(expected.astype(dtype))
+    # differing bits per element (np.bitwise_count needs numpy 2)
+    flipped_bits = np.unpackbits(changed.view(np.uint8)).reshape(len(changed), 8 * dtype.itemsize).sum(axis=1)
+    localization = {
+        "file_row": file_row,
+        "row_group": row_group,
+        "data_pages": [page.page_index for page in data_pages],
+        "classification": classify(num_expected, num_observed, num_rereads * len(REREAD_ENGINES)),
+        "max_flipped_bits": int(flipped_bits.max()) if len(flipped_bits) else 0,
+        "localization_ms": (time.perf_counter() - time_start) * 1000,
+    }
+
+    if reproducer_dir is not None:
+        dump_reproducer(
+            path_file,
+            row_group,
+            col_to_check,
+            [page for page in pages if page.page_type == "DICTIONARY_PAGE"] + data_pages,
+            {**violation, **localization, "row_in_row_group": row_in_row_group, "rereads": rereads},
+            reproducer_dir,
+        )
+    return localization
+
+
+def dump_reproducer(
+    path_file: Path,
+    row_group: int,
+    col: str,
+    pages: list[PageLocation],
+    description: dict[str, Any],
+    reproducer_dir: Path,
+) -> Path:
+    """
+    Write the raw bytes (headers and compressed bodies) of `pages` to `<name>_pages.bin`, the affected row written
+    with the codec of the column chunk to `<name>_row.parquet` and a description of both to `<name>.json`.
+    """
+    reproducer_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{path_file.parent.name}_{path_file.stem}_rg{row_group}_row{description['file_row']}"
+    name += f"_rep{description['rep']}" if "rep" in description else ""
+
+    with open(path_file, "rb") as f, open(reproducer_dir / f"{name}_pages.bin", "wb") as f_pages:
+        for page in pages:
+            f.seek(page.offset)
+            f_pages.write(f.read(page.num_bytes))
+
+    metadata = pq.read_metadata(path_file)
+    column = metadata.row_group(row_group).column(leaf_column_index(metadata, col))
+    row = pq.ParquetFile(path_file).read_row_group(row_group).slice(description["row_in_row_group"], 1)
+    codec = "none" if column.compression == "UNCOMPRESSED" else column.compression.lower()
+    pq.write_table(row, reproducer_dir / f"{name}_row.parquet", compression=codec)
+
+    description = {
+        **description,
+        "path_file": str(path_file),
+        "column_path": column.path_in_schema,
+        "compression": column.compression,
+        "encodings": list(column.encodings),
+        "created_by": metadata.created_by,
+        "pages": [asdict(page) for page in pages],
+    }
+    path_description = reproducer_dir / f"{name}.json"
+    path_description.write_text(json.dumps(description, indent=2, default=str))
+    return path_description